@@ -1,14 +1,35 @@
-from urllib.request import urlopen, urlretrieve
+from urllib.request import urlopen, Request
+from urllib.error import URLError, HTTPError
 import bs4 as bs
 from bs4 import NavigableString, Tag
+from bs4.element import Comment, Declaration, Doctype, ProcessingInstruction
 import sys
 import time
 import io, re
+import codecs
+import tempfile
 import fasttext
+import numpy as np
 import fitz
+try:
+    import httpx
+except ImportError:
+    httpx = None
 import operator
-from collections import OrderedDict
-import signal
+import heapq
+from bisect import bisect_left
+from collections import OrderedDict, deque
+import socket
+import hashlib
+import math
+import pickle
+import sqlite3
+import asyncio
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from urllib.parse import urlparse
 from difflib import SequenceMatcher
 import os
 from os.path import isfile, join
@@ -19,13 +40,481 @@ from operator import itemgetter
 class TimeoutException(Exception):
     pass
 
-def timeout_handler(signum, frame):
-    raise TimeoutException
+
+class Deadline:
+    """
+    A time budget for one stage of processing a url (connecting, reading or parsing).
+    Long running code calls check between its steps, which raises a TimeoutException once the budget is spent.
+    Unlike signal.alarm this works in any thread, and the work done before the deadline is not thrown away.
+    """
+
+    def __init__(self, seconds, stage):
+        self.seconds = seconds
+        self.stage = stage
+        self.end = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.end - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        if self.expired():
+            raise TimeoutException(self.stage + " took over " + str(self.seconds) + " seconds")
 
 def get_html(link_url):
+    return open_url(link_url)
+
+
+http_settings = {"pooled": True, "http2": True, "max_connections": 200, "max_keepalive_connections": 50}
+http_client = None
+http_client_pid = None
+http_client_lock = threading.Lock()
+
+def configure_http_client(pooled = True, http2 = True, max_connections = 200, max_keepalive_connections = 50):
+    """
+    Sets up the HTTP client that every download (get_html, fetch_page, text_from_txt, get_pdf_text and the PageFetcher) goes through.
+    The pooled client is an httpx.Client that keeps connections open between requests to the same host, uses HTTP/2 when
+    the server supports it (and the h2 package is installed) and decodes gzip, deflate and brotli (with the brotli package) bodies.
+    Without httpx, or with pooled False, every url is opened with its own urlopen connection.
+
+    Inputs:
+    pooled - If True, the pooled client is used when httpx is installed. Default is True
+    http2 - If True, HTTP/2 is used where available. Default is True
+    max_connections - The maximum number of open connections. Default is 200
+    max_keepalive_connections - The maximum number of idle connections kept open. Default is 50
+    """
+
+    global http_client
+    http_settings["pooled"] = pooled
+    http_settings["http2"] = http2
+    http_settings["max_connections"] = max_connections
+    http_settings["max_keepalive_connections"] = max_keepalive_connections
+    if http_client is not None and http_client_pid == os.getpid():
+        http_client.close()
+    http_client = None
+
+
+def get_http_client():
+    """
+    Returns the pooled httpx.Client set up by configure_http_client, or None if urlopen should be used.
+    Each process makes its own client, since connections cannot be shared with worker processes.
+    """
+
+    global http_client, http_client_pid
+    if httpx is None or not http_settings["pooled"]:
+        return None
+    with http_client_lock:
+        if http_client is None or http_client_pid != os.getpid():
+            http_client = httpx.Client(**http_client_options())
+            http_client_pid = os.getpid()
+        return http_client
+
+
+def http_client_options(max_connections = None):
+    """
+    Returns the keyword arguments of httpx.Client and httpx.AsyncClient for the settings of configure_http_client.
+
+    Inputs:
+    max_connections - The maximum number of open connections, instead of the one set by configure_http_client. The
+    number of idle connections kept open is capped by it too. Default is None
+    """
+
+    http2 = http_settings["http2"]
+    if http2:
+        try:
+            import h2
+        except ImportError:
+            http2 = False
+    if max_connections is None:
+        max_connections = http_settings["max_connections"]
+    limits = httpx.Limits(max_connections=max_connections,
+                          max_keepalive_connections=min(http_settings["max_keepalive_connections"], max_connections))
+    return {"http2": http2, "limits": limits, "follow_redirects": True}
+
+
+class PooledResponse(io.RawIOBase):
+    """
+    Makes a streamed httpx response readable like the file urlopen returns, with status and headers, so the rest of
+    the code does not depend on which client opened the url. The body is decoded (gzip, brotli, ...) as it is read.
+    """
+
+    def __init__(self, response, connect_timeout):
+        self.response = response
+        self.status = response.status_code
+        self.headers = response.headers
+        self.connect_timeout = connect_timeout
+        self.chunks = response.iter_bytes()
+        self.pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self.pending) == 0:
+            try:
+                self.pending = next(self.chunks)
+            except StopIteration:
+                return 0
+            except httpx.TimeoutException:
+                raise TimeoutException("Reading stalled for over " + str(self.connect_timeout) + " seconds")
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def read1(self, size = -1):
+        return self.read(size)
+
+    def close(self):
+        self.response.close()
+        super().close()
+
+
+def get_charset(headers):
+    """
+    Returns the charset in the Content-Type of a response's headers, or None if there is none.
+    """
+
+    match = re.search(r'charset="?([^";\s]+)', headers.get("Content-Type", ""), re.IGNORECASE)
+    if match is None:
+        return None
+    return match.group(1)
+
+
+def open_url(link_url, connect_timeout = 10, headers = None):
+    """
+    Opens a url for reading, raising a TimeoutException if the server takes over connect_timeout seconds to connect or,
+    once connected, to start its response. connect_timeout is also the longest a single read from the opened url may wait. headers is a dictionary of extra request headers.
+    """
+
+    link_url=link_url.replace(" ", "%20")
+    client = get_http_client()
+    if client is not None:
+        request = client.build_request("GET", link_url, headers=headers,
+                                       timeout=httpx.Timeout(connect_timeout, pool=None))
+        try:
+            response = client.send(request, stream=True)
+        except httpx.ConnectTimeout:
+            raise TimeoutException("Connecting took over " + str(connect_timeout) + " seconds")
+        except httpx.TimeoutException:
+            raise TimeoutException("Waiting for the response took over " + str(connect_timeout) + " seconds")
+        if response.status_code >= 400 or response.status_code == 304:
+            response.close()
+            raise HTTPError(link_url, response.status_code, response.reason_phrase, response.headers, None)
+        return PooledResponse(response, connect_timeout)
+
+    try:
+        return urlopen(Request(link_url, headers=headers if headers is not None else {}), timeout=connect_timeout)
+    except socket.timeout:
+        # urlopen wraps the timeouts of connecting and sending the request in a URLError, so this one came while waiting for the response
+        raise TimeoutException("Waiting for the response took over " + str(connect_timeout) + " seconds")
+    except URLError as e:
+        if isinstance(e.reason, socket.timeout):
+            raise TimeoutException("Connecting took over " + str(connect_timeout) + " seconds")
+        raise
+
+
+def fetch_page(link_url, connect_timeout = 10, read_timeout = 30, file = None):
+    """
+    Downloads the body of a url.
+
+    Inputs:
+    link_url - The url of the page
+    connect_timeout - Seconds to wait for the server to connect and for each piece of the body. Default is 10
+    read_timeout - Seconds the whole body may take to download. Default is 30
+    file - If given, the body is written to this file as it downloads instead of being returned. Default is None
+
+    Output:
+    The bytes of the page, or None if file is given
+    """
+
+    return fetch_response(link_url, connect_timeout, read_timeout, None, file)[2]
+
+
+def fetch_response(link_url, connect_timeout = 10, read_timeout = 30, headers = None, file = None):
+    """
+    Same as fetch_page, but sends extra request headers and also returns the status and headers of the response.
+    A 304 Not Modified response, to a request with If-None-Match or If-Modified-Since, is returned instead of raised.
+
+    Output:
+    A list of [the status code, the response headers, the bytes of the page (None if file is given or the status is 304)]
+    """
+
+    try:
+        source = open_url(link_url, connect_timeout, headers)
+    except HTTPError as e:
+        if e.code == 304:
+            return [304, e.headers, None]
+        raise
+    status = source.status
+    response_headers = source.headers
+    deadline = Deadline(read_timeout, "Reading")
+    body = []
+    with source:
+        while True:
+            try:
+                chunk = source.read1(65536)
+            except socket.timeout:
+                raise TimeoutException("Reading stalled for over " + str(connect_timeout) + " seconds")
+            if not chunk:
+                break
+            if file is not None:
+                file.write(chunk)
+            else:
+                body.append(chunk)
+            deadline.check()
+    if file is not None:
+        return [status, response_headers, None]
+    return [status, response_headers, b"".join(body)]
+
+
+async def fetch_response_async(client, link_url, connect_timeout = 10, read_timeout = 30, headers = None):
+    """
+    Same as fetch_response, but downloads on an event loop with an httpx.AsyncClient, so a download in flight does not hold a thread.
+    """
+
     link_url=link_url.replace(" ", "%20")
-    source = urlopen(link_url)
-    return source
+    request = client.build_request("GET", link_url, headers=headers, timeout=httpx.Timeout(connect_timeout, pool=None))
+    try:
+        response = await client.send(request, stream=True)
+    except httpx.ConnectTimeout:
+        raise TimeoutException("Connecting took over " + str(connect_timeout) + " seconds")
+    except httpx.TimeoutException:
+        raise TimeoutException("Waiting for the response took over " + str(connect_timeout) + " seconds")
+    try:
+        if response.status_code == 304:
+            return [304, response.headers, None]
+        if response.status_code >= 400:
+            raise HTTPError(link_url, response.status_code, response.reason_phrase, response.headers, None)
+        deadline = Deadline(read_timeout, "Reading")
+        body = []
+        try:
+            async for chunk in response.aiter_bytes():
+                body.append(chunk)
+                deadline.check()
+        except httpx.TimeoutException:
+            raise TimeoutException("Reading stalled for over " + str(connect_timeout) + " seconds")
+        return [response.status_code, response.headers, b"".join(body)]
+    finally:
+        await response.aclose()
+
+
+class SpillFile:
+    """
+    A file that is written in memory until it grows over max_size bytes, and is then moved to a temporary file with a
+    unique name, so large downloads do not fill the memory and no two downloads share a file.
+    name is None while the file is in memory.
+    """
+
+    def __init__(self, max_size, suffix = ""):
+        self.max_size = max_size
+        self.suffix = suffix
+        self.file = io.BytesIO()
+        self.name = None
+
+    def write(self, data):
+        self.file.write(data)
+        if self.name is None and self.file.tell() > self.max_size:
+            temp_file = tempfile.NamedTemporaryFile(suffix=self.suffix, delete=False)
+            temp_file.write(self.file.getvalue())
+            self.file = temp_file
+            self.name = temp_file.name
+
+    def getvalue(self):
+        return self.file.getvalue()
+
+    def close(self):
+        self.file.close()
+
+    def remove(self):
+        self.close()
+        if self.name is not None and isfile(self.name):
+            os.remove(self.name)
+
+
+class PageFetcher:
+    """
+    Downloads pages concurrently on an asyncio event loop running in a background thread, so the crawler
+    can keep processing the pages that have already arrived while hundreds of others are still downloading.
+    Every host has its own limit on the number of downloads in flight.
+    The downloads use an httpx.AsyncClient with at most max_connections open connections, so they do not need a thread
+    each. Without httpx, or when configure_http_client turned pooling off, each download runs fetch_response in a
+    thread of a pool of max_connections threads instead.
+
+    Use submit to start downloading a url and get to wait for the next finished one.
+    """
+
+    def __init__(self, max_connections = 200, max_connections_per_host = 8, connect_timeout = 10, read_timeout = 30):
+        self.max_connections_per_host = max_connections_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.in_flight = 0
+        self.host_limits = {}
+        self.finished = queue.Queue()
+        self.loop = asyncio.new_event_loop()
+        if httpx is not None and http_settings["pooled"]:
+            self.client = httpx.AsyncClient(**http_client_options(max_connections))
+            self.executor = None
+        else:
+            self.client = None
+            self.executor = ThreadPoolExecutor(max_workers=max_connections)
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def submit(self, url, download = True, headers = None):
+        """
+        Starts downloading a url, sending the extra request headers if given. If download is False, the url is handed back by get without a response.
+        """
+
+        self.in_flight = self.in_flight + 1
+        if download:
+            asyncio.run_coroutine_threadsafe(self.fetch(url, headers), self.loop)
+        else:
+            self.finished.put([url, None])
+
+    async def fetch(self, url, headers = None):
+        host = urlparse(url).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = [asyncio.Semaphore(self.max_connections_per_host), 0]
+        limit = self.host_limits[host]
+        limit[1] = limit[1] + 1
+        try:
+            async with limit[0]:
+                try:
+                    if self.client is not None:
+                        source = await fetch_response_async(self.client, url, self.connect_timeout, self.read_timeout, headers)
+                    else:
+                        source = await self.loop.run_in_executor(self.executor, fetch_response, url, self.connect_timeout, self.read_timeout, headers)
+                except Exception as e:
+                    source = e
+        finally:
+            limit[1] = limit[1] - 1
+            if limit[1] == 0:
+                del self.host_limits[host]  # hosts with nothing in flight do not keep a semaphore
+        self.finished.put([url, source])
+
+    def get(self):
+        """
+        Waits for a download to finish.
+
+        Output:
+        A list of the url and its response (the output of fetch_response). The response is None if it was not downloaded, or the exception raised while downloading it.
+        """
+
+        result = self.finished.get()
+        self.in_flight = self.in_flight - 1
+        return result
+
+    def close(self):
+        if self.client is not None:
+            asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+
+class ResponseCache:
+    """
+    Remembers the websites the crawler has downloaded, so a later crawl of the same pages can skip the ones that have
+    not changed. For every url it keeps the ETag and Last-Modified validators the server sent, a hash of the body and
+    what parse_url found on the page (its title, if it was in the language and its links, but not its sentences,
+    which are already in the sentence files). On a re-crawl headers gives the If-None-Match and If-Modified-Since
+    headers to send, and page gives back what was found on the page if the server answers 304 Not Modified or sends
+    the same body again, so the page does not have to be parsed.
+    The bodies themselves are kept in path/bodies, named by their hash, so identical pages are only stored once.
+
+    Inputs:
+    path - The directory of the cache. Default is "response_cache"
+    store_bodies - If False, only the hashes of the bodies are kept. Default is True
+    commit_every - The number of stored pages between commits to the database. Default is 100
+    """
+
+    def __init__(self, path = "response_cache", store_bodies = True, commit_every = 100):
+        self.path = path
+        self.store_bodies = store_bodies
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        if not os.path.isdir(join(path, "bodies")):
+            os.makedirs(join(path, "bodies"))
+        self.connection = sqlite3.connect(join(path, "responses.db"))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, digest TEXT, page BLOB)")
+        self.connection.commit()
+
+    def headers(self, url):
+        """
+        Returns a dictionary of the conditional request headers for a url, empty if it is not in the cache.
+        """
+
+        row = self.connection.execute("SELECT etag, last_modified FROM responses WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row is not None:
+            if row[0] is not None:
+                headers["If-None-Match"] = row[0]
+            if row[1] is not None:
+                headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def page(self, url, response):
+        """
+        Returns the stored output of parse_url for a url if the response (the output of fetch_response) shows the page
+        has not changed since it was stored. Otherwise, returns None.
+        """
+
+        row = self.connection.execute("SELECT digest, page FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        if response[0] == 304 or hashlib.sha256(response[2]).hexdigest() == row[0]:
+            return pickle.loads(row[1])
+        return None
+
+    def store(self, url, response, page):
+        """
+        Stores the response of a url and the output of parse_url for it, without its sentences.
+        Pages that were not parsed because their title was already traversed are not stored.
+        """
+
+        url_tag, title, sentences, is_language, links = page
+        if sentences is None:  # not parsed, since its title was already traversed
+            return
+        status, headers, body = response
+        digest = hashlib.sha256(body).hexdigest()
+        if self.store_bodies:
+            body_path = join(self.path, "bodies", digest)
+            if not isfile(body_path):
+                temp_path = body_path + ".tmp"
+                with open(temp_path, "wb") as file:
+                    file.write(body)
+                os.replace(temp_path, body_path)
+        self.connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                                (url, headers.get("ETag"), headers.get("Last-Modified"), digest,
+                                 pickle.dumps([url_tag, title, None, is_language, links])))
+        self.uncommitted = self.uncommitted + 1
+        if self.uncommitted >= self.commit_every:
+            self.commit()
+
+    def body(self, digest):
+        """
+        Returns a stored body from its hash, or None if it is not stored.
+        """
+
+        body_path = join(self.path, "bodies", digest)
+        if not isfile(body_path):
+            return None
+        with open(body_path, "rb") as file:
+            return file.read()
+
+    def commit(self):
+        self.connection.commit()
+        self.uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.connection.close()
 
 
 def get_soup(url):
@@ -33,172 +522,240 @@ def get_soup(url):
     soup = bs.BeautifulSoup(source, 'lxml')
     return soup
 
-def get_paragraphs(soup):
+def add_text_block(blocks, seen, tag_name, parts):
+    """
+    Used in get_text_blocks. Adds the lines of a finished block that are not in seen to blocks, and empties parts.
+    """
+
+    text = "".join(parts).strip()
+    del parts[:]
+    for line in text.split("\n"):
+        key = " ".join(line.split())
+        if key != "" and key not in seen:
+            seen.add(key)
+            blocks.append([tag_name, line])
+
+
+def get_text_blocks(soup, deadline = None):
+    """
+    Walks a BeautifulSoup's soup once and returns each block of text on the page once, with the name of the tag it came from.
+
+    A block is the text inside a p, div, tr or td tag (or a span that is not inside one of them). Text inside a nested
+    block tag is its own block and is not repeated in its parent's block, other tags (a, b, span, li, etc.) are part of the
+    block they are in, and a br tag ends a line. Scripts, styles and comments are skipped, and a line that already came
+    up on the page is not returned again.
+
+    Inputs:
+    soup - Should be the "soup" of the url. Use get_soup to get the soup of the url.
+    deadline - A Deadline checked every 1000 steps of the walk. Default is None
+
+    Outputs:
+    A list of [tag name, text] pairs, in the order they are on the page
+    """
+
+    block_tags = ["p", "div", "tr", "td"]
+    skip_tags = ["script", "style", "template"]
+    skip_strings = (Comment, Declaration, Doctype, ProcessingInstruction)
+    newline = ["\r\n", "\r", "\n"]
+
+    blocks = []
+    seen = set()
+
+    # each entry is [the children left to walk, the block's tag name, the block's text so far, how deep the entry is under the block's tag]
+    stack = [[iter(soup.children), None, [], 0]]
+    steps = 0
+    while len(stack) != 0:
+        steps = steps + 1
+        if deadline is not None and steps % 1000 == 0:
+            deadline.check()
+        children, tag_name, parts, depth = stack[-1]
+        child = next(children, None)
+
+        if child is None:
+            stack.pop()
+            if depth == 0:
+                add_text_block(blocks, seen, tag_name, parts)
+            elif depth == 1 and tag_name != "p":
+                parts.append(" ")
+        elif isinstance(child, NavigableString):
+            if tag_name is not None and not isinstance(child, skip_strings):
+                add = str(child)
+                for line in newline:
+                    add = add.replace(line, " ")
+                if depth == 0 and tag_name != "p":
+                    add = " " + add + " "
+                parts.append(add)
+        elif isinstance(child, Tag) and child.name not in skip_tags:
+            if child.name == "br":
+                parts.append("\n")
+            elif child.name in block_tags or (child.name == "span" and tag_name is None):
+                if tag_name is not None:
+                    add_text_block(blocks, seen, tag_name, parts)
+                stack.append([iter(child.children), child.name, [], 0])
+            else:
+                if depth == 0 and tag_name is not None and tag_name != "p":
+                    parts.append(" ")
+                stack.append([iter(child.children), tag_name, parts, depth + 1])
+
+    return blocks
+
+
+def get_paragraphs(soup, deadline = None):
     """
     Use this on a BeautifulSoup's soup (use the get_soup function on a url to get it's soup) 
     in order to get the paragraphs from a url. Returns the texts in a paragraph in a list.
     
     Inputs:
     soup - Should be the "soup" of the url. Use get_soup to get the soup of the url.
+    deadline - A Deadline checked while the page is walked. Default is None
     
     Outputs:
     Each paragraph's texts in a list
     """
 
-    texts = []
-    newline = ["\r\n", "\r", "\n"]
-    for p in soup.findAll('p'):
-        text = ""
-        for child in p:
-            if isinstance(child, NavigableString):
-                add = str(child)
-                for line in newline:
-                    add = add.replace(line, " ")
-                text += add
-            elif isinstance(child, Tag):
-                if child.name != 'br':
-                    add = child.text
-                    for line in newline:
-                        add = add.replace(line, " ")
-                    text += add
-                else:
-                    text += '\n'
+    return [text for tag_name, text in get_text_blocks(soup, deadline)]
 
-        result = text.strip().split('\n')
-        for sen in result:
-            texts.append(sen)
 
-    for p in soup.findAll('span'):
-        text = ""
-        for child in p:
-            if isinstance(child, NavigableString):
-                add = " " + str(child) + " "
-                for line in newline:
-                    add = add.replace(line, " ")
-                text += add
-            elif isinstance(child, Tag):
-                if child.name != 'br':
-                    add = " " + child.text + " "
-                    for line in newline:
-                        add = add.replace(line, " ")
-                    text += add
-                else:
-                    text += '\n'
+default_abbreviations = ["i.a.", "i. a.", "i.e.", "i. e.", "p.ex.", "p. ex.", "sr.", "sra.", "srta.", "a.i.", "a. i.",
+                         "etc.", ".html", ".com", ".org", ".net", ".int", ".edu", ".gov", ".mil",".rice", ".onet", ".se", ".pl",
+                         "...", "Dr.", "Mrs.", "Mr.", "Ms.", "pp."]
+abbreviation_regexes = {}
+
+def get_abbreviation_regexes(abbreviations):
+    """
+    Compiles a list of abbreviations into regexes, once per list. For every position a period has in any of the
+    abbreviations, there is one regex of all of the abbreviations with a period at that position, so a period in a
+    text can be checked with one match per position instead of comparing it with every abbreviation.
+    Letters match in lower or upper case, like comparing with .lower().
 
-        result = text.strip().split('\n')
-        for sen in result:
-            texts.append(sen)
+    Output:
+    A list of [position of the period in the abbreviations, compiled regex]
+    """
 
-    for p in soup.find_all('div'):
-        text = ""
-        for child in p:
-            if isinstance(child, NavigableString):
-                add = " " + str(child) + " "
-                for line in newline:
-                    add = add.replace(line, " ")
-                text += add
-            elif isinstance(child, Tag):
-                if child.name != 'br':
-                    add = " " + child.text + " "
-                    for line in newline:
-                        add = add.replace(line, " ")
-                    text += add
+    key = tuple(abbreviations)
+    if key not in abbreviation_regexes:
+        alternatives = {}
+        for abr in sorted(set(abr.lower() for abr in abbreviations), key=len, reverse=True):
+            pattern = ""
+            for ltr in abr:
+                if len(ltr.upper()) == 1 and ltr.upper() != ltr:
+                    pattern += "[" + ltr + ltr.upper() + "]"
                 else:
-                    text += '\n'
+                    pattern += re.escape(ltr)
+            for index, ltr in enumerate(abr):
+                if ltr == ".":
+                    alternatives.setdefault(index, []).append(pattern)
+        abbreviation_regexes[key] = [[index, re.compile("|".join(alternatives[index]))] for index in sorted(alternatives)]
+    return abbreviation_regexes[key]
+
+def abbreviation_periods(text, abbreviation_regexes):
+    """
+    Used in split_sentences. Returns a set of the positions in text of every period that is part of an abbreviation.
+    abbreviation_regexes should be the output of get_abbreviation_regexes.
+    """
 
-        result = text.strip().split('\n')
-        for sen in result:
-            texts.append(sen)
+    periods = set()
+    period = text.find(".")
+    while period != -1:
+        for index, regex in abbreviation_regexes:
+            if index <= period and regex.match(text, period - index) is not None:
+                periods.add(period)
+                break
+        period = text.find(".", period + 1)
+    return periods
 
-    for p in soup.find_all('tr'):
-        text = ""
-        for child in p:
-            if isinstance(child, NavigableString):
-                add = " " + str(child) + " "
-                for line in newline:
-                    add = add.replace(line, " ")
-                text += add
-            elif isinstance(child, Tag):
-                if child.name != 'br':
-                    add = " " + child.text + " "
-                    for line in newline:
-                        add = add.replace(line, " ")
-                    text += add
-                else:
-                    text += '\n'
+sentence_mark_regex = re.compile("[.!?]")
+link_period_regex = re.compile("(?<=www)\\.")
+attached_mark_regex = re.compile("[.!?](?=[^ \"\'‘’])")
 
-        result = text.strip().split('\n')
-        for sen in result:
-            texts.append(sen)
+def split_sentences_regex(text, abbreviation_regexes, allow_lower_case_start = False, allow_number_start = False):
+    """
+    Used in split_sentences when regex_engine is True. Gives the same sentences as the character loop, but finds the
+    punctuation that does not end a sentence with regexes over the whole text instead of checking each mark in turn.
+    text should already have its whitespace collapsed to single spaces.
 
-    for p in soup.find_all('td'):
-        text = ""
-        for child in p:
-            if isinstance(child, NavigableString):
-                add = " " + str(child) + " "
-                for line in newline:
-                    add = add.replace(line, " ")
-                text += add
-            elif isinstance(child, Tag):
-                if child.name != 'br':
-                    add = " " + child.text + " "
-                    for line in newline:
-                        add = add.replace(line, " ")
-                    text += add
-                else:
-                    text += '\n'
+    Inputs:
+    text - The text to split
+    abbreviation_regexes - The output of get_abbreviation_regexes
+    allow_lower_case_start, allow_number_start - Same as extract_sentences'
 
-        result = text.strip().split('\n')
-        for sen in result:
-            texts.append(sen)
+    Output:
+    A list of the sentences in text
+    """
 
-    # for text in texts:
-    #     print(text)
-    #     print("=========================")
-    return texts
+    alphabet = ["a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l", "m", "n", "o", "p", "q", "r", "s", "t", "u", "v", "w", "x", "y", "z", "\"", "\'", "‘"]
+    quotes = ["\"", "\'", "‘","’"]
+
+    marks = [match.start() for match in sentence_mark_regex.finditer(text)]
+    if len(marks) == 0:
+        return []
 
+    not_ends = abbreviation_periods(text, abbreviation_regexes)                         # periods in abbreviations
+    not_ends.update(match.start() for match in link_period_regex.finditer(text))       # periods in links
+    not_ends.update(match.start() for match in attached_mark_regex.finditer(text))     # a character right after the mark
+    for i in range(len(marks) - 1):  # 2 or less words, or 5 or less chars, before the next mark
+        if marks[i + 1] - marks[i] <= 5 or text.count(" ", marks[i] + 1, marks[i + 1]) + (text[marks[i] + 1] != " ") <= 2:
+            not_ends.add(marks[i])
+
+    sentences = []
+    start = 0
+    for end in marks:
+        if end in not_ends:
+            continue
+        first = text[start]
+        sentence_start = 1
+        if first.isupper() or (first.islower() and allow_lower_case_start) or (first.isdigit() and allow_number_start) or first in quotes:
+            if end + 1 < len(text) and text[end + 1] in quotes:
+                sentence_start = 2
+            sentences.append(text[start:end + sentence_start])
+
+        for next_start in range(end + sentence_start, len(text)):  # the next sentence starts at the next letter or number
+            if text[next_start].lower() in alphabet or text[next_start].isdigit():
+                start = next_start
+                break
+    return sentences
 
-def extract_sentences(fraction, texts, allow_lower_case_start = False, allow_number_start = False, min = 0.3):
+def split_sentences(texts, allow_lower_case_start = False, allow_number_start = False, abbreviations = None, regex_engine = False, deadline = None):
     """
-    Extracts the interlingua and non-interlingua sentences from a block of text
-    
-    Inputs:
-    fraction - Used to determin if a block of text is mainly interlingua. If the fraction of Interlingua senteces to total sentences in the block of text is greater ot equal than variable fraction, then function extract_sentences' 3rd output is True. Otherwise, the 3rd output is false.
-    texts - A list of texts that you wish to extract sentences from
-    allow_lower_case_start - If this is set to True, then it will detect sentences that start with a lower case letter. If set to false, all detected sentences will start with an upper case letter. Default is False.
-    allow_lower_case_start - If this is set to True, then it will detect sentences that start with a number. If set to false, all detected sentences will not start with a letter. Default is False.
-    min - The minimum confidence value given by the interlingua-detection model in order to consider the sentence to be an interlingua sentence. Default is 0.3
-    
-    Outputs:
-    Output 1 - A list of the Interlingua senteces that are in variable texts. Any "Interlingua" sentences that had a value less than min from the Interlingua-detection model are not included in this list
-    Output 2 - A list of the non-Interlingua senteces that are in variable texts.
-    Output 3 - True if the fraction of Interlingua sentences is greater than or equal to variable fraction. Otherwise, return False
-    Output 4 - A list of all senteces the sentences in text (a combination of output 1 and 2)
+    Used in extract_sentences. Splits a list of texts into sentences, without running the language model.
+    The inputs are the same as extract_sentences'.
+
+    Output:
+    A list of the sentences in texts
     """
-    
+
     spaces = [" ", "\u00A0"]
     newline = ["\r\n", "\r", "\n"]
     punctuation = [".", "!", "?"]
-    abbreviations = ["i.a.", "i. a.", "i.e.", "i. e.", "p.ex.", "p. ex.", "sr.", "sra.", "srta.", "a.i.", "a. i.",
-                     "etc.", ".html", ".com", ".org", ".net", ".int", ".edu", ".gov", ".mil",".rice", ".onet", ".se", ".pl",
-                     "...", "Dr.", "Mrs.", "Mr.", "Ms.", "pp."]
+    if abbreviations is None:
+        abbreviations = default_abbreviations
+    abbreviation_regexes = get_abbreviation_regexes(abbreviations)
     websites = ["com", "org", "net", "int", "edu", "gov", "mil","rice", "onet", "se", "pl"]
     alphabet = ["a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l", "m", "n", "o", "p", "q", "r", "s", "t", "u", "v", "w", "x", "y", "z", "\"", "\'", "‘"]
     quotes = ["\"", "\'", "‘","’"]
     sentences = []
     for text in texts:
+        if deadline is not None:
+            deadline.check()
         split = text.split()
         if len(split) > 0 and split[0][-1] == ":":  # check if the first word ends with a ":"
             split.remove(split[0])
 
         text = " ".join(split)
+        if regex_engine:
+            sentences.extend(split_sentences_regex(text, abbreviation_regexes, allow_lower_case_start, allow_number_start))
+            continue
+
         sentence_ends = [i for i, ltr in enumerate(text) if
                          ltr in punctuation]  # find period locations in sent.
         start = 0
+        periods = abbreviation_periods(text, abbreviation_regexes) if len(sentence_ends) > 0 else set()
 
         i = 0
         breakx = 0
         while i < len(sentence_ends):  # looking at all period locations
+            if deadline is not None and i % 1000 == 999:
+                deadline.check()
             interrupt = 0
             if len(sentence_ends) > 0 and sentence_ends[i] >= 3 and text[sentence_ends[i] - 3:sentence_ends[i]+1] == "www.":  # check if period is part of a link
                 interrupt = 1
@@ -214,17 +771,8 @@ def extract_sentences(fraction, texts, allow_lower_case_start = False, allow_num
                                                                                                      # it is most likely not a sentence end.
                     interrupt = 1
 
-            for abr in abbreviations:  # checking if the period is in an abbreviation and not a sentence end
-                abr_periods = [i for i, ltr in enumerate(abr) if ltr == "."]
-                for period_index in abr_periods:
-                    if sentence_ends[i] - period_index >= 0 and \
-                            sentence_ends[i] + len(abr) - period_index <= len(text) and \
-                            text[(sentence_ends[i] - period_index):(
-                                    sentence_ends[i] + len(abr) - period_index)].lower() == abr.lower():
-                        interrupt = 1
-                        break
-                if interrupt == 1:
-                    break
+            if sentence_ends[i] in periods:  # checking if the period is in an abbreviation and not a sentence end
+                interrupt = 1
 
             if interrupt == 0:
                 if text[start].isupper() or (text[start].islower() and allow_lower_case_start) or (text[start].isdigit() and allow_number_start) \
@@ -252,14 +800,31 @@ def extract_sentences(fraction, texts, allow_lower_case_start = False, allow_num
                         sentence_start = sentence_start + 1
 
             i = i + 1
-    i = 0
-    while i < len(sentences):
-        if len(sentences[i].split()) <= 2 and len(sentences[i]) <= 5:  # If a "sentence" has 2 or less words and less
-                                                                       # than or equal to 5 chars, delete it
-            sentences.remove(sentences[i])
-            i = i - 1
-        i = i + 1
+    # If a "sentence" has 2 or less words and less than or equal to 5 chars, delete it
+    return [sentence for sentence in sentences if not (len(sentence.split()) <= 2 and len(sentence) <= 5)]
 
+def extract_sentences(fraction, texts, allow_lower_case_start = False, allow_number_start = False, min = 0.3, abbreviations = None, regex_engine = False, deadline = None):
+    """
+    Extracts the interlingua and non-interlingua sentences from a block of text
+    
+    Inputs:
+    fraction - Used to determin if a block of text is mainly interlingua. If the fraction of Interlingua senteces to total sentences in the block of text is greater ot equal than variable fraction, then function extract_sentences' 3rd output is True. Otherwise, the 3rd output is false.
+    texts - A list of texts that you wish to extract sentences from
+    allow_lower_case_start - If this is set to True, then it will detect sentences that start with a lower case letter. If set to false, all detected sentences will start with an upper case letter. Default is False.
+    allow_lower_case_start - If this is set to True, then it will detect sentences that start with a number. If set to false, all detected sentences will not start with a letter. Default is False.
+    min - The minimum confidence value given by the interlingua-detection model in order to consider the sentence to be an interlingua sentence. Default is 0.3
+    abbreviations - A list of the abbreviations whose periods do not end a sentence, for texts in another language. If None, default_abbreviations is used. Default is None
+    regex_engine - If True, the sentences are found by split_sentences_regex instead of the character loop. Both give the same sentences. Default is False
+    deadline - A Deadline checked while the texts are split into sentences. Default is None
+    
+    Outputs:
+    Output 1 - A list of the Interlingua senteces that are in variable texts. Any "Interlingua" sentences that had a value less than min from the Interlingua-detection model are not included in this list
+    Output 2 - A list of the non-Interlingua senteces that are in variable texts.
+    Output 3 - True if the fraction of Interlingua sentences is greater than or equal to variable fraction. Otherwise, return False
+    Output 4 - A list of all senteces the sentences in text (a combination of output 1 and 2)
+    """
+    
+    sentences = split_sentences(texts, allow_lower_case_start, allow_number_start, abbreviations, regex_engine, deadline)
     output = findAndSeperateLanguage(sentences, fraction, "__label__INA", min)
     # if(output[0]):
     #     return output[1], output[2]
@@ -267,11 +832,187 @@ def extract_sentences(fraction, texts, allow_lower_case_start = False, allow_num
     #     return output[1], -1
     return output[1], output[2], output[0], sentences
 
+
+def iter_sentences(texts, batch_size = 1000, allow_lower_case_start = False, allow_number_start = False, abbreviations = None, regex_engine = False):
+    """
+    A generator version of extract_sentences for documents too large to keep in memory. texts can be any iterable,
+    such as a generator reading a file, and is read one text at a time. The sentences are given to the language model
+    in batches of batch_size, so at most one batch of sentences is held at once.
+
+    Inputs:
+    texts - An iterable of texts that you wish to extract sentences from
+    batch_size - The number of sentences classified at a time. Default is 1000
+    The other inputs are the same as extract_sentences'.
+
+    Output:
+    Yields a tuple of (sentence, language lable, confidence value) for each sentence, in order.
+    prediction_string(lable, confidence value) gives the prediction the way the sentence files store it.
+    """
+
+    batch = []
+    for text in texts:
+        batch.extend(split_sentences([text], allow_lower_case_start, allow_number_start, abbreviations, regex_engine))
+        while len(batch) >= batch_size:
+            labels, probs = predict_languages(batch[:batch_size])
+            for i in range(batch_size):
+                yield batch[i], labels[i], probs[i]
+            del batch[:batch_size]
+
+    if len(batch) != 0:
+        labels, probs = predict_languages(batch)
+        for i in range(len(batch)):
+            yield batch[i], labels[i], probs[i]
+
+
+def benchmark_sentence_engines(texts, repeat = 3):
+    """
+    Times split_sentences with the character loop and with split_sentences_regex on the same texts, and checks that
+    they give the same sentences.
+
+    Inputs:
+    texts - A list of texts, like the ones given to extract_sentences
+    repeat - The number of times each engine is run. The fastest run is used. Default is 3
+
+    Output:
+    A list of [the seconds the loop took, the seconds the regex engine took, True if both gave the same sentences]
+    """
+
+    times = []
+    outputs = []
+    for regex_engine in [False, True]:
+        best = None
+        for i in range(repeat):
+            start = time.perf_counter()
+            sentences = split_sentences(texts, regex_engine=regex_engine)
+            seconds = time.perf_counter() - start
+            if best is None or seconds < best:
+                best = seconds
+        times.append(best)
+        outputs.append(sentences)
+    print("Loop:", round(times[0], 4), "seconds, regex:", round(times[1], 4), "seconds")
+    return [times[0], times[1], outputs[0] == outputs[1]]
+
+
+class LanguageCache:
+    """
+    A least recently used cache of the language model's predictions, so text that shows up again (menus, footers,
+    sentences repeated across pages) is only given to the model once. Texts are looked up by a hash of the text with
+    its spaces and tabs collapsed, which the model does not see a difference in.
+    hits and misses count the lookups that were and were not in the cache, to help choose max_size.
+
+    Inputs:
+    max_size - The maximum number of predictions kept. Default is 200000
+    path - A file the cache is loaded from, if it exists, and saved to by save. Default is None
+    """
+
+    def __init__(self, max_size = 200000, path = None):
+        self.max_size = max_size
+        self.path = path
+        self.predictions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path is not None and isfile(path):
+            with open(path, "rb") as file:
+                self.predictions = pickle.load(file)
+
+    def normalize(self, text):
+        return re.sub("[ \t\r\v\f]+", " ", text).strip(" ")
+
+    def key(self, text):
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def predict(self, texts):
+        """
+        Same as predict_languages, using the cached predictions where possible.
+        """
+
+        keys = []
+        missing = OrderedDict()
+        for text in texts:
+            text = self.normalize(text)
+            key = self.key(text)
+            keys.append(key)
+            if key in self.predictions:
+                self.predictions.move_to_end(key)
+                self.hits = self.hits + 1
+            elif key not in missing:
+                missing[key] = text
+                self.misses = self.misses + 1
+            else:
+                self.hits = self.hits + 1
+
+        found = {}
+        if len(missing) != 0:
+            labels, probs = model.predict(list(missing.values()))
+            i = 0
+            for key in missing:
+                found[key] = (labels[i][0], float(probs[i][0]))
+                i = i + 1
+
+        out_labels = []
+        out_probs = []
+        for key in keys:
+            if key in found:
+                prediction = found[key]
+            else:
+                prediction = self.predictions[key]
+            out_labels.append(prediction[0])
+            out_probs.append(prediction[1])
+
+        for key in found:
+            self.predictions[key] = found[key]
+        while len(self.predictions) > self.max_size:
+            self.predictions.popitem(last=False)
+        return out_labels, np.array(out_probs)
+
+    def save(self):
+        if self.path is not None:
+            with open(self.path, "wb") as file:
+                pickle.dump(self.predictions, file)
+
+    def __len__(self):
+        return len(self.predictions)
+
+    def __str__(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total != 0 else 0
+        return "Language cache: " + str(len(self.predictions)) + " entries, " + str(self.hits) + " hits, " + \
+               str(self.misses) + " misses (" + str(round(hit_rate, 1)) + "% hit rate)"
+
+
+def predict_languages(sentences):
+    """
+    Runs the language model on a list of sentences. Each distinct sentence is given to the model at most once,
+    and all of the ones that are not in language_cache are given in a single call.
+
+    Inputs:
+    sentences - A list of sentences
+
+    Outputs:
+    Output 1 - A list of the most likely language lable of each sentence
+    Output 2 - A numpy array of the confidence value of each lable
+    """
+
+    return language_cache.predict(sentences)
+
+def predict_language(text):
+    """
+    Runs the language model on one text. Returns the most likely language lable and its confidence value.
+    """
+
+    labels, probs = language_cache.predict([text])
+    return labels[0], probs[0]
+
+def prediction_string(label, prob):
+    """
+    Formats a prediction the same way as model.predict(sentence).__str__(), which is what the sentence files store
+    """
+
+    return ((label,), np.array([prob])).__str__()
+
 def findLanguage(sentences, fraction, language_lable):
-    count = 0
-    for sentence in sentences:
-        if model.predict(sentence)[0][0] == language_lable:
-            count  = count + 1
+    labels = predict_languages(sentences)[0]
+    count = labels.count(language_lable)
     return len(sentences)*fraction + 1 <= count
 
 def findAndSeperateLanguage(sentences, fraction, language_lable, min = 0.3):
@@ -282,14 +1023,15 @@ def findAndSeperateLanguage(sentences, fraction, language_lable, min = 0.3):
     count = 0
     INA = []
     nonINA = []
-    for sentence in sentences:
-        if model.predict(sentence)[0][0] == language_lable:
-            if model.predict(sentence)[1][0] >= min:
+    labels, probs = predict_languages(sentences)
+    for i in range(len(sentences)):
+        if labels[i] == language_lable:
+            if probs[i] >= min:
                 count  = count + 1
-                INA.append(sentence + " || " + model.predict(sentence).__str__())
+                INA.append(sentences[i] + " || " + prediction_string(labels[i], probs[i]))
         else:
-            if model.predict(sentence)[1][0] >= min:
-                nonINA.append(sentence + " || " +  model.predict(sentence).__str__())
+            if probs[i] >= min:
+                nonINA.append(sentences[i] + " || " +  prediction_string(labels[i], probs[i]))
     return len(sentences)*fraction + 1 <= count, INA, nonINA
 
 def get_links(soup, original_link):
@@ -344,15 +1086,65 @@ def load_vectors(fname):
     return data
 
 
-def checkForLanguage(lable, fraction, soup, min = 0.9):
+def get_tag_texts(soup, tag_names, deadline = None):
+    """
+    Walks a BeautifulSoup's soup once and gets the text of every tag whose name is in tag_names. Each tag's text is
+    built from the texts of its children, so the text of a page is only read once instead of once for every tag
+    it is inside of. Gives the same text as getText, and the texts of each name are in the order their tags start in
+    the page, as with find_all.
+
+    Inputs:
+    soup - The soup of the website
+    tag_names - A list of the names of the tags to get the text of
+    deadline - A Deadline checked every 1000 steps of the walk. Default is None
+
+    Output:
+    A dictionary with each name in tag_names as a key and a list of the texts of those tags as the value
+    """
+
+    texts = {}
+    for name in tag_names:
+        texts[name] = []
+
+    # each tag in tag_names takes its place in texts when the walk gets to it, and its text is filled in when the walk leaves it
+    stack = [[soup, iter(soup.children), [], None]]
+    steps = 0
+    while len(stack) != 0:
+        steps = steps + 1
+        if deadline is not None and steps % 1000 == 0:
+            deadline.check()
+        tag, children, parts, index = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            text = "".join(parts)
+            if len(stack) != 0:
+                stack[-1][2].append(text)
+            if index is not None:
+                texts[tag.name][index] = text
+        elif type(child) is NavigableString:
+            parts.append(child)
+        elif isinstance(child, Tag):
+            index = None
+            if child.name in texts:
+                index = len(texts[child.name])
+                texts[child.name].append(None)
+            stack.append([child, iter(child.children), [], index])
+    return texts
+
+
+def checkForLanguage(lable, fraction, soup, min = 0.9, deadline = None):
     """
     Used to check if a page is writting in a language. Considers the title, spans, divs, headers, anchors, and paragraphs of the website.
+    The title is checked first and then each kind of tag, starting with the kinds with the fewest different texts. It stops as soon as
+    the answer can't change anymore, so most pages that are not in the language are rejected without classifying their divs.
     
     Inputs:
     lable - String of the lable of the language you want to check for
     fraction - The minimum threshhold for the fraction of the total sentences that in the language in order for the website to be considered to be written in that language
     soup - The soup of the website
     min - The minimum confidence value given by the interlingua-detection model in order to consider the sentence to be an interlingua sentence. Default is 0.3
+    deadline - A Deadline checked while the page is walked and before each kind of tag is classified. Default is None
     
     Output:
     True if the website is condered to be variable lable's language. Otherwise, return false
@@ -360,76 +1152,25 @@ def checkForLanguage(lable, fraction, soup, min = 0.9):
     
     print()
     print("Checking if page is " + lable)
-    valid = 0
-    count = 0
-    total_count = 0
-    for p in soup.findAll('p'):
-        if model.predict(p.getText().replace("\n",""))[1][0] >= min:
-            if model.predict(p.getText().replace("\n",""))[0][0] == lable:
-                count = count + 1
-            total_count = total_count + 1
-    if total_count == 0:
-        valid = valid + 0.5
-    elif total_count * fraction <= count:
-        valid = valid + 1.5
-    print("paragraph", count, total_count)
+    headings = ["h1", "h2", "h3", "h4", "h5", "h6"]
+    tag_texts = get_tag_texts(soup, ["p", "span", "div", "a"] + headings, deadline)
+
+    heading_texts = []
+    for heading in headings:
+        heading_texts = heading_texts + tag_texts[heading]
+    categories = [["paragraph", tag_texts["p"]], ["span", tag_texts["span"]], ["div", tag_texts["div"]],
+                  ["anchor", [text for text in tag_texts["a"] if len(text) > 3]], ["heading", heading_texts]]
+    for category in categories:
+        category[1] = [text.replace("\n","") for text in category[1]]
+    categories.sort(key=lambda category: len(set(category[1])))
 
-    count = 0
-    total_count = 0
-    for p in soup.findAll('span'):
-        if model.predict(p.getText().replace("\n",""))[1][0] >= min:
-            if model.predict(p.getText().replace("\n",""))[0][0] == lable:
-                count = count + 1
-            total_count = total_count + 1
-    if total_count == 0:
-        valid = valid + 0.5
-    elif total_count * fraction <= count:
-        valid = valid + 1.5
-    print("span", count, total_count)
-
-    count = 0
-    total_count = 0
-    for p in soup.findAll('div'):
-        if model.predict(p.getText().replace("\n",""))[1][0] >= min:
-            if model.predict(p.getText().replace("\n",""))[0][0] == lable:
-                count = count + 1
-            total_count = total_count + 1
-    if total_count == 0:
-        valid = valid + 0.5
-    elif total_count * fraction <= count:
-        valid = valid + 1.5
-    print("div", count, total_count)
-
-    count = 0
-    total_count = 0
-    for a in soup.findAll('a'):
-        if len(a.getText()) > 3:
-            if model.predict(a.getText().replace("\n",""))[1][0] >= min:
-                if model.predict(a.getText().replace("\n",""))[0][0] == lable:
-                    count = count + 1
-                total_count = total_count + 1
-    if total_count == 0:
-        valid = valid + 0.5
-    elif total_count * fraction <= count:
-        valid = valid + 1.5
-    print("anchor", count, total_count)
-
-    count = 0
-    total_count = 0
-    for h in soup.find_all(re.compile('^h[1-6]$')):
-        if model.predict(h.getText().replace("\n",""))[1][0] >= min:
-            if model.predict(h.getText().replace("\n",""))[0][0] == lable:
-                count = count + 1
-            total_count = total_count + 1
-    if total_count == 0:
-        valid = valid + 0.5
-    elif total_count * fraction <= count:
-        valid = valid + 1.5
-    print("heading", count, total_count)
+    valid = 0
+    remaining = len(categories)
 
     title = soup.find('title')
     try:
-        if (model.predict(title.getText())[0][0] == lable and model.predict(title.getText())[1][0] >= min):
+        title_lable, title_prob = predict_language(title.getText())
+        if (title_lable == lable and title_prob >= min):
             valid = valid + 1.5
             print("Title is INA")
         elif title.getText().lower().find("interlingua")!=-1 or title.getText().lower().find("le encyclopedia libere")!=-1:
@@ -437,16 +1178,37 @@ def checkForLanguage(lable, fraction, soup, min = 0.9):
             print("Title contains interlingua")
 
         elif title.getText().lower().find("wiki")!=-1 and \
-                        model.predict(title.getText())[0][0] == lable and model.predict(title.getText())[1][0] >= 0.5:
+                        title_lable == lable and title_prob >= 0.5:
             print("Title is wiki INA")
             valid = valid + 1.5
         else:
-            print("Title:", model.predict(title.getText())[0][0], model.predict(title.getText())[1][0])
+            print("Title:", title_lable, title_prob)
             print("Title not INA:", title.getText())
     except:
         pass
 
-
+    for name, texts in categories:
+        if valid >= 3 or valid + remaining * 1.5 < 3:  # each kind of tag adds at most 1.5
+            print("Skipped", name, "(already decided)")
+            remaining = remaining - 1
+            continue
+
+        if deadline is not None:
+            deadline.check()
+        count = 0
+        total_count = 0
+        labels, probs = predict_languages(texts)
+        for i in range(len(texts)):
+            if probs[i] >= min:
+                if labels[i] == lable:
+                    count = count + 1
+                total_count = total_count + 1
+        if total_count == 0:
+            valid = valid + 0.5
+        elif total_count * fraction <= count:
+            valid = valid + 1.5
+        print(name, count, total_count)
+        remaining = remaining - 1
 
     print("Valid value (>=3):",  valid)
     print()
@@ -457,33 +1219,170 @@ def checkForLanguage(lable, fraction, soup, min = 0.9):
         return False
 
 
-def fonts(doc, granularity=False):  # thanks to https://towardsdatascience.com/extracting-headers-and-paragraphs-from-pdf-using-pymupdf-676e8421c467
+def pdf_blocks(doc, deadline = None):
+    """
+    Lays out every page of a pdf once and returns its text blocks, the ones in page.get_text("dict")["blocks"] with type 0,
+    in order. Give the output to fonts and headers_para so the pdf is not laid out again by each of them.
+
+    Inputs:
+    doc - The fitz document
+    deadline - A Deadline checked after each page. Default is None
+
+    Output:
+    A list of the text blocks of every page
+    """
+
+    text_blocks = []
+    for page in doc:
+        for b in page.get_text("dict")["blocks"]:
+            if b['type'] == 0:
+                text_blocks.append(b)
+        if deadline is not None:
+            deadline.check()
+    return text_blocks
+
+
+def open_pdf(pdf):
+    """
+    Opens a pdf with fitz from its bytes or its file name.
+    """
+
+    if isinstance(pdf, bytes):
+        return fitz.open(stream=pdf, filetype="pdf")
+    return fitz.open(pdf)
+
+
+pdf_pool = None
+pdf_pool_pid = None
+pdf_pool_workers = 0
+
+def start_pdf_pool(workers):
+    """
+    Starts the process pool parallel_pdf_blocks lays out pages in, or returns it if it is already running with this many
+    workers. The same pool is used for every pdf until close_pdf_pool is called. The crawler starts it before its own
+    threads, for the reason given in start_process_pool.
+    """
+
+    global pdf_pool, pdf_pool_pid, pdf_pool_workers
+    if pdf_pool is not None and pdf_pool_pid == os.getpid() and pdf_pool_workers == workers:
+        return pdf_pool
+    close_pdf_pool()
+    pdf_pool = start_process_pool(workers)
+    pdf_pool_pid = os.getpid()
+    pdf_pool_workers = workers
+    return pdf_pool
+
+
+def close_pdf_pool():
+    """
+    Shuts down the pool started by start_pdf_pool.
+    """
+
+    global pdf_pool
+    if pdf_pool is not None and pdf_pool_pid == os.getpid():
+        pdf_pool.shutdown(wait=False, cancel_futures=True)
+    pdf_pool = None
+
+
+def pdf_blocks_in_worker(file_name, first, last):
+    """
+    Used in parallel_pdf_blocks. Returns the text blocks of the pages first to last - 1 of a pdf file, like pdf_blocks.
+    The pdf is closed before returning, so a temporary pdf does not stay open in an idle worker once it is removed.
+    Only the parts of the spans that fonts and headers_para use are kept, so less has to be sent back to the main process.
+    """
+
+    doc = fitz.open(file_name)
+    text_blocks = []
+    try:
+        for page_number in range(first, last):
+            for b in doc[page_number].get_text("dict")["blocks"]:
+                if b['type'] == 0:
+                    lines = []
+                    for l in b["lines"]:
+                        spans = []
+                        for s in l["spans"]:
+                            spans.append({'size': s['size'], 'flags': s['flags'], 'font': s['font'], 'color': s['color'], 'text': s['text']})
+                        lines.append({"spans": spans})
+                    text_blocks.append({'type': 0, "lines": lines})
+    finally:
+        doc.close()
+    return text_blocks
+
+
+def parallel_pdf_blocks(pdf, page_count, workers, pages_per_task = 16, deadline = None):
+    """
+    Same as pdf_blocks, but the pages are laid out in the pool of worker processes started by start_pdf_pool. The pdf
+    is split into ranges of pages_per_task pages, and the blocks of each range are put back together in page order,
+    so the output is the same as pdf_blocks'. A pdf given as bytes is written to a temporary file for the workers to open.
+
+    Inputs:
+    pdf - The bytes or the file name of the pdf
+    page_count - The number of pages in the pdf
+    workers - The number of worker processes
+    pages_per_task - The number of pages each worker lays out at a time. Default is 16
+    deadline - A Deadline for laying out the whole pdf. Default is None
+
+    Output:
+    A list of the text blocks of every page
+    """
+
+    temp_name = None
+    if isinstance(pdf, bytes):
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
+            temp_file.write(pdf)
+        temp_name = temp_file.name
+        file_name = temp_name
+    else:
+        file_name = os.path.abspath(pdf)
+
+    text_blocks = []
+    pool = start_pdf_pool(workers)
+    tasks = []
+    try:
+        tasks = [pool.submit(pdf_blocks_in_worker, file_name, first, min(first + pages_per_task, page_count))
+                 for first in range(0, page_count, pages_per_task)]
+        for task in tasks:
+            try:
+                text_blocks.extend(task.result(None if deadline is None else max(deadline.remaining(), 0)))
+            except FutureTimeoutError:
+                deadline.check()
+                raise
+    finally:
+        for task in tasks:
+            task.cancel()
+        if temp_name is not None:
+            os.remove(temp_name)
+    return text_blocks
+
+
+def fonts(doc, granularity=False, blocks=None):  # thanks to https://towardsdatascience.com/extracting-headers-and-paragraphs-from-pdf-using-pymupdf-676e8421c467
     """Extracts fonts and their usage in PDF documents.
     :param doc: PDF document to iterate through
     :type doc: <class 'fitz.fitz.Document'>
     :param granularity: also use 'font', 'flags' and 'color' to discriminate text
     :type granularity: bool
+    :param blocks: the output of pdf_blocks(doc), laid out here if None
+    :type blocks: list
     :rtype: [(font_size, count), (font_size, count}], dict
     :return: most used fonts sorted by count, font style information
     """
     styles = {}
     font_counts = {}
 
-    for page in doc:
-        blocks = page.getText("dict")["blocks"]
-        for b in blocks:  # iterate through the text blocks
-            if b['type'] == 0:  # block contains text
-                for l in b["lines"]:  # iterate through the text lines
-                    for s in l["spans"]:  # iterate through the text spans
-                        if granularity:
-                            identifier = "{0}_{1}_{2}_{3}".format(s['size'], s['flags'], s['font'], s['color'])
-                            styles[identifier] = {'size': s['size'], 'flags': s['flags'], 'font': s['font'],
-                                                  'color': s['color']}
-                        else:
-                            identifier = "{0}".format(s['size'])
-                            styles[identifier] = {'size': s['size'], 'font': s['font']}
+    if blocks is None:
+        blocks = pdf_blocks(doc)
+    for b in blocks:  # iterate through the text blocks
+        for l in b["lines"]:  # iterate through the text lines
+            for s in l["spans"]:  # iterate through the text spans
+                if granularity:
+                    identifier = "{0}_{1}_{2}_{3}".format(s['size'], s['flags'], s['font'], s['color'])
+                    styles[identifier] = {'size': s['size'], 'flags': s['flags'], 'font': s['font'],
+                                          'color': s['color']}
+                else:
+                    identifier = "{0}".format(s['size'])
+                    styles[identifier] = {'size': s['size'], 'font': s['font']}
 
-                        font_counts[identifier] = font_counts.get(identifier, 0) + 1  # count the fonts usage
+                font_counts[identifier] = font_counts.get(identifier, 0) + 1  # count the fonts usage
 
     font_counts = sorted(font_counts.items(), key=operator.itemgetter(1), reverse=True)
 
@@ -527,12 +1426,14 @@ def font_tags(font_counts, styles):  # thanks to https://towardsdatascience.com/
     return size_tag
 
 
-def headers_para(doc, size_tag):  # thanks to https://towardsdatascience.com/extracting-headers-and-paragraphs-from-pdf-using-pymupdf-676e8421c467
+def headers_para(doc, size_tag, blocks=None):  # thanks to https://towardsdatascience.com/extracting-headers-and-paragraphs-from-pdf-using-pymupdf-676e8421c467
     """Scrapes headers & paragraphs from PDF and return texts with element tags.
     :param doc: PDF document to iterate through
     :type doc: <class 'fitz.fitz.Document'>
     :param size_tag: textual element tags for each size
     :type size_tag: dict
+    :param blocks: the output of pdf_blocks(doc), laid out here if None
+    :type blocks: list
     :rtype: list
     :return: texts with pre-prended element tags
     """
@@ -540,75 +1441,107 @@ def headers_para(doc, size_tag):  # thanks to https://towardsdatascience.com/ext
     first = True  # boolean operator for first header
     previous_s = {}  # previous span
 
-    for page in doc:
-        blocks = page.getText("dict")["blocks"]
-        for b in blocks:  # iterate through the text blocks
-            if b['type'] == 0:  # this block contains text
-
-                # REMEMBER: multiple fonts and sizes are possible IN one block
-
-                block_string = ""  # text found in block
-                for l in b["lines"]:  # iterate through the text lines
-                    for s in l["spans"]:  # iterate through the text spans
-                        if s['text'].strip():  # removing whitespaces:
-                            if first:
-                                previous_s = s
-                                first = False
-                                block_string = size_tag[s['size']] + s['text']
-                            else:
-                                if s['size'] == previous_s['size']:
+    if blocks is None:
+        blocks = pdf_blocks(doc)
+    for b in blocks:  # iterate through the text blocks
 
-                                    if block_string and all((c == "|") for c in block_string):
-                                        # block_string only contains pipes
-                                        block_string = size_tag[s['size']] + s['text']
-                                    if block_string == "":
-                                        # new block has started, so append size tag
-                                        block_string = size_tag[s['size']] + s['text']
-                                    else:  # in the same block, so concatenate strings
-                                        block_string += " " + s['text']
+        # REMEMBER: multiple fonts and sizes are possible IN one block
 
-                                else:
-                                    header_para.append(block_string)
-                                    block_string = size_tag[s['size']] + s['text']
+        block_string = ""  # text found in block
+        for l in b["lines"]:  # iterate through the text lines
+            for s in l["spans"]:  # iterate through the text spans
+                if s['text'].strip():  # removing whitespaces:
+                    if first:
+                        previous_s = s
+                        first = False
+                        block_string = size_tag[s['size']] + s['text']
+                    else:
+                        if s['size'] == previous_s['size']:
 
-                                previous_s = s
+                            if block_string and all((c == "|") for c in block_string):
+                                # block_string only contains pipes
+                                block_string = size_tag[s['size']] + s['text']
+                            if block_string == "":
+                                # new block has started, so append size tag
+                                block_string = size_tag[s['size']] + s['text']
+                            else:  # in the same block, so concatenate strings
+                                block_string += " " + s['text']
 
-                    # new block started, indicating with a pipe
-                    block_string += "|"
+                        else:
+                            header_para.append(block_string)
+                            block_string = size_tag[s['size']] + s['text']
+
+                        previous_s = s
+
+            # new block started, indicating with a pipe
+            block_string += "|"
 
-                header_para.append(block_string)
+        header_para.append(block_string)
 
     return header_para
 
 
-def get_pdf_text(url, is_url=True):
+def get_pdf_text(url, is_url=True, connect_timeout = 10, read_timeout = 30, parse_timeout = None, max_memory_size = 64 * 1024 * 1024,
+                 pdf_workers = 0, min_parallel_pages = 100):
     """
     Used to get the paragraph text out of a pdf.
     
     Inputs:
     url - The url of the pdf or the name of the pdf in the same directory
     is_url - If the pdf is from a url, this should be True. If it's a pdf in your directory, this should be False. Deafult is True.
+    connect_timeout - The connect_timeout of fetch_page when downloading the pdf. Default is 10
+    read_timeout - The read_timeout of fetch_page when downloading the pdf. Default is 30
+    parse_timeout - Seconds the pdf may take to be read once it is downloaded. If None, there is no limit. Default is None
+    max_memory_size - Downloaded pdfs up to this many bytes are opened from memory. Larger ones are written to a
+    temporary file with a unique name, which is removed afterwards. Default is 64 MB
+    pdf_workers - If more than 0, pdfs with at least min_parallel_pages pages are laid out by parallel_pdf_blocks
+    with this many worker processes. The pool is kept for the next pdf until close_pdf_pool is called. Default is 0
+    min_parallel_pages - Pdfs with fewer pages are laid out in this process. Default is 100
     
     Output:
     A list of each paragraph in the pdf.
     """
     
     out = []
+    pdf_file = None
     if is_url:
-        urlretrieve(url, 'temp.pdf')
-        doc = fitz.open("temp.pdf")
+        pdf_file = SpillFile(max_memory_size, ".pdf")
+        try:
+            fetch_page(url, connect_timeout, read_timeout, pdf_file)
+            if pdf_file.name is None:
+                pdf = pdf_file.getvalue()
+            else:
+                pdf = pdf_file.name
+            pdf_file.close()
+            doc = open_pdf(pdf)
+        except Exception:
+            pdf_file.remove()
+            raise
     else:
-        doc = fitz.open(url)
+        pdf = url
+        doc = open_pdf(pdf)
+    deadline = Deadline(parse_timeout, "Parsing") if parse_timeout is not None else None
 
-    font = fonts(doc)
+    try:
+        if pdf_workers > 0 and len(doc) >= min_parallel_pages:
+            blocks = parallel_pdf_blocks(pdf, len(doc), pdf_workers, deadline=deadline)
+        else:
+            blocks = pdf_blocks(doc, deadline)
+        font = fonts(doc, blocks=blocks)
 
-    # print(font)
+        # print(font)
 
-    tags = font_tags(font[0], font[1])
+        tags = font_tags(font[0], font[1])
 
-    # print(tags)
+        # print(tags)
 
-    headers = headers_para(doc, tags)
+        headers = headers_para(doc, tags, blocks)
+        if deadline is not None:
+            deadline.check()
+    finally:
+        doc.close()
+        if pdf_file is not None:
+            pdf_file.remove()
 
     # print(headers)
 
@@ -621,60 +1554,106 @@ def get_pdf_text(url, is_url=True):
     return out
 
 
-def text_from_txt(url, is_url=True):
+def detect_encoding(sample, charset = None):
+    """
+    Guesses the encoding of a text file from its first bytes. A byte order mark is trusted first. Otherwise, if the
+    sample has non-ASCII bytes it is utf-8 if most of them decode as utf-8, and if the sample is all ASCII the server's charset
+    is used when there is one, as it says what the rest of the file is in. cp1252 is used when nothing else fits.
+
+    Inputs:
+    sample - The first bytes of the file
+    charset - The charset given in the server's Content-Type header, if any. Default is None
+
+    Output:
+    The name of the encoding
+    """
+
+    boms = [[codecs.BOM_UTF32_LE, "utf-32"], [codecs.BOM_UTF32_BE, "utf-32"], [codecs.BOM_UTF8, "utf-8-sig"],
+            [codecs.BOM_UTF16_LE, "utf-16"], [codecs.BOM_UTF16_BE, "utf-16"]]
+    for bom, encoding in boms:
+        if sample.startswith(bom):
+            return encoding
+
+    if charset is not None:
+        try:
+            codecs.lookup(charset)
+        except LookupError:
+            charset = None
+
+    if sample.isascii():
+        return charset if charset is not None else "utf-8"
+    text = sample.decode("utf-8", errors="replace")
+    invalid = text.count("\ufffd")
+    if len(text) - len(sample.decode("ascii", errors="ignore")) - invalid > invalid:  # mostly valid utf-8 characters
+        return "utf-8"
+    return charset if charset is not None else "cp1252"
+
+
+def open_txt(url, is_url=True, connect_timeout = 10):
+    """
+    Opens a txt file from a url or from your directory for reading as text, a line at a time, with its encoding found by
+    detect_encoding. Bytes that do not fit the encoding are replaced instead of raising an error.
+    """
+
+    charset = None
+    if is_url:
+        source = open_url(url, connect_timeout)
+        charset = get_charset(source.headers)
+        source = io.BufferedReader(source, 65536)
+    else:
+        source = open(url, "rb", buffering=65536)  # so peek can see the first 64 KB, not just the default buffer
+    encoding = detect_encoding(source.peek(65536)[:65536], charset)
+    return io.TextIOWrapper(source, encoding=encoding, errors="replace")
+
+
+def iter_txt_paragraphs(file, deadline = None):
+    """
+    Reads a text file a line at a time and yields each paragraph (the lines between blank lines) once it ends, with its
+    line breaks turned into spaces and the hyphens that split a word over two lines removed. The last paragraph is
+    always yielded, even if it is empty.
+
+    Inputs:
+    file - A file opened as text, such as the output of open_txt
+    deadline - A Deadline checked after each line. Default is None
+    """
+
+    continuation = ["-\r\n","-\r","-\n"]
+    linebreaks = ["\r\n","\r","\n"]
+    parts = []
+    for line in file:
+        if deadline is not None:
+            deadline.check()
+        if(line in linebreaks):
+            text = "".join(parts)
+            if text != "":
+                yield text
+            parts = []
+        else:
+            for cont in continuation:
+                line = line.replace(cont, "")
+            for breaks in linebreaks:
+                line = line.replace(breaks, " ")
+            parts.append(line)
+    yield "".join(parts)
+
+
+def text_from_txt(url, is_url=True, connect_timeout = 10, read_timeout = 30):
     """
     Used to get the text out of a txt file.
     
     Inputs:
     url - The url of the txt file or the name of the txt file in the same directory
     is_url - If the txt file is from a url, this should be True. If it's a txt file in your directory, this should be False. Deafult is True.
+    connect_timeout - The connect_timeout of open_url when downloading the txt file. Default is 10
+    read_timeout - Seconds the whole txt file may take to download. Default is 30
     
     Output:
-    A list of each paragraph in the txt file.
+    A list of each paragraph in the txt file. Use iter_txt_paragraphs(open_txt(url, is_url)) to read large files a paragraph at a time.
     """
     
-    continuation = ["-\r\n","-\r","-\n"]
-    linebreaks = ["\r\n","\r","\n"]
-    if is_url:
-        source = urlopen(url)
-
-        lines = []
-        text = ""
-
-        for line in source:
-            line = line.decode("utf-8")
-            if(line in linebreaks):
-                if text != "":
-                    lines.append(text)
-                text = ""
-            else:
-                for cont in continuation:
-                    line = line.replace(cont, "")
-
-                for breaks in linebreaks:
-                    line = line.replace(breaks, " ")
-                text += line
-        lines.append(text)
-        return lines
-    else:
-        file = open(url, "r")
-        file_lines = file.readlines()
-        text = ""
-        lines = []
-
-        for line in file_lines:
-            if(line in linebreaks):
-                if text != "":
-                    lines.append(text)
-                text = ""
-            else:
-                for cont in continuation:
-                    line = line.replace(cont, "")
-                for breaks in linebreaks:
-                    line = line.replace(breaks, " ")
-                text += line
-        lines.append(text)
-        return lines
+    deadline = Deadline(read_timeout, "Reading") if is_url else None
+    with open_txt(url, is_url, connect_timeout) as file:
+        return list(iter_txt_paragraphs(file, deadline))
 
 def remove_duplicates(file):
     """
@@ -739,15 +1718,208 @@ def check_if_two_passages_are_translations(INA_line, NON_line):
         return False
 
 
-def find_similar_string(array, string, start, decimal):
-    
-    for i in range(len(array)-start):
-        if SequenceMatcher(None,array[start+i], string).ratio() >= decimal:
-            return start+i
+class SimilarityMatrix:
+    """
+    The SequenceMatcher ratios between the special character strings of two lists of texts, keyed by their positions
+    (i, j) and scored the first time they are asked for. SequenceMatcher's ratio depends on which string comes first,
+    so a score of strings_two[j] against strings_one[i] (reverse) is kept apart from strings_one[i] against strings_two[j].
+    The scores are kept in a least recently used store, which can be shared by the matrices of an AlignmentArtifacts so
+    they have one memory cap between them. hits and misses count the lookups that were and were not in the store.
+
+    Inputs:
+    strings_one, strings_two - The special character strings of the two lists of texts
+    store - An OrderedDict the scores are kept in. Default is None (a new one)
+    max_size - The maximum number of scores kept in store. The least recently used ones are forgotten beyond it. Default is 1000000
+    band - If not None, only the scores of the pairs within band of the diagonal are kept. The others are scored every time they are asked for. Default is None
+    number - Tells the scores of this matrix apart from the others in store. Default is 0
+    """
+
+    def __init__(self, strings_one, strings_two, store = None, max_size = 1000000, band = None, number = 0):
+        self.strings_one = strings_one
+        self.strings_two = strings_two
+        self.store = OrderedDict() if store is None else store
+        self.max_size = max_size
+        self.band = band
+        self.number = number
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, i, j, reverse = False):
+        """
+        The saved score of (i, j), or None if it has not been scored or was forgotten.
+        """
+
+        key = (self.number, i, j, reverse)
+        ratio = self.store.get(key)
+        if ratio is None:
+            self.misses = self.misses + 1
+        else:
+            self.store.move_to_end(key)
+            self.hits = self.hits + 1
+        return ratio
+
+    def put(self, i, j, reverse, ratio):
+        """
+        Saves the score of (i, j).
+        """
+
+        if self.band is not None and abs(i - j * len(self.strings_one) / max(len(self.strings_two), 1)) > self.band:
+            return
+        self.store[(self.number, i, j, reverse)] = ratio
+        while len(self.store) > self.max_size:
+            self.store.popitem(last=False)
+
+    def ratio(self, i, j, reverse = False):
+        """
+        SequenceMatcher(None, strings_one[i], strings_two[j]).ratio(), or SequenceMatcher(None, strings_two[j], strings_one[i]).ratio() if reverse is True.
+        """
+
+        ratio = self.get(i, j, reverse)
+        if ratio is None:
+            if reverse:
+                ratio = SequenceMatcher(None, self.strings_two[j], self.strings_one[i]).ratio()
+            else:
+                ratio = SequenceMatcher(None, self.strings_one[i], self.strings_two[j]).ratio()
+            self.put(i, j, reverse, ratio)
+        return ratio
+
+
+class AlignmentArtifacts:
+    """
+    The parts of aligning a pair of documents that do not depend on the sureness value or percent: the sentences of each
+    paragraph, the special characters of each text (see get_special_chars) and a SimilarityMatrix for each pair of lists
+    of texts that has been aligned (the paragraphs, and the sentences of each pair of parallel paragraphs). One is kept
+    per document pair, so a sweep over sureness values and percents only re-runs the matching decisions.
+
+    Inputs:
+    max_scores - The maximum number of similarity scores kept, between all of the matrices. Default is 1000000
+    band - Given to each SimilarityMatrix. Default is None
+    """
+
+    def __init__(self, max_scores = 1000000, band = None):
+        self.max_scores = max_scores
+        self.band = band
+        self.sentence_cache = {}
+        self.special_chars_cache = {}
+        self.matrices = {}
+        self.scores = OrderedDict()
+
+    def sentences(self, text):
+        """
+        The sentences of a paragraph. Same as extract_sentences(0.3, [text])[3], without running the language model.
+        """
+
+        sentences = self.sentence_cache.get(text)
+        if sentences is None:
+            sentences = split_sentences([text])
+            self.sentence_cache[text] = sentences
+        return sentences
+
+    def special_chars(self, texts):
+        """
+        A list of the special characters of each text in texts.
+        """
+
+        out = []
+        for text in texts:
+            chars = self.special_chars_cache.get(text)
+            if chars is None:
+                chars = get_special_chars(text)
+                self.special_chars_cache[text] = chars
+            out.append(chars)
+        return out
+
+    def matrix(self, array_one, array_two):
+        """
+        The SimilarityMatrix of two lists of texts, made the first time it is asked for.
+        """
+
+        key = (tuple(array_one), tuple(array_two))
+        matrix = self.matrices.get(key)
+        if matrix is None:
+            matrix = SimilarityMatrix(self.special_chars(array_one), self.special_chars(array_two), self.scores,
+                                      self.max_scores, self.band, len(self.matrices))
+            self.matrices[key] = matrix
+        return matrix
+
+
+class LengthIndex:
+    """
+    The positions of a list of strings, grouped by the length of the strings. The SequenceMatcher ratio of two strings
+    can never be more than 2*min(length one, length two)/(length one + length two), so find_similar_string uses this
+    to only score the strings whose lengths allow them to be similar enough.
+    """
+
+    def __init__(self, strings):
+        self.positions = {}
+        for i in range(len(strings)):
+            self.positions.setdefault(len(strings[i]), []).append(i)
+        self.lengths = sorted(self.positions)
+
+    def candidates(self, length, start, end, decimal):
+        """
+        Yields, in increasing order, the positions from start up to (not including) end of the strings whose length
+        can give a ratio of at least decimal with a string of the given length.
+        """
+
+        groups = []
+        for other in self.lengths:
+            total = other + length
+            if total != 0 and 2.0 * min(other, length) / total < decimal:
+                continue
+            positions = self.positions[other]
+            first = bisect_left(positions, start)
+            last = bisect_left(positions, end)
+            if first < last:
+                groups.append(map(positions.__getitem__, range(first, last)))
+        return heapq.merge(*groups)
+
+
+def find_similar_string(array, string, start, decimal, index = None, window = None, matrix = None, row = None):
+    """
+    Finds the first string in array, from the index start onwards, that is similar to string.
+
+    Inputs:
+    array - A list of strings
+    string - The string to look for
+    start - The index of array to start looking from
+    decimal - The lowest SequenceMatcher ratio that counts as similar
+    index - A LengthIndex of array. Pass one in when calling this many times on the same array. Default is None (built here)
+    window - If not None, only the next window strings from start are looked at. Default is None
+    matrix - A SimilarityMatrix whose strings_two is array and strings_one[row] is string. Its saved scores are used and added to. Default is None
+    row - The position of string in the matrix's strings_one. Default is None
+
+    Output:
+    The index of the first similar string. If there is none, returns -1
+    """
+
+    if index is None:
+        index = LengthIndex(array)
+    end = len(array)
+    if window is not None:
+        end = min(end, start + window)
+
+    matcher = SequenceMatcher(None)
+    matcher.set_seq2(string)
+    for position in index.candidates(len(string), start, end, decimal):
+        if matrix is not None:
+            ratio = matrix.get(row, position, True)
+            if ratio is not None:
+                if ratio >= decimal:
+                    return position
+                continue
+        matcher.set_seq1(array[position])
+        if matcher.quick_ratio() < decimal:
+            continue
+        ratio = matcher.ratio()
+        if matrix is not None:
+            matrix.put(row, position, True, ratio)
+        if ratio >= decimal:
+            return position
     return -1
 
 
-def parallel_texts(array_one, array_two, sureness_value = 3, percent_check = 0.8):
+def parallel_texts(array_one, array_two, sureness_value = 3, percent_check = 0.8, window = None, artifacts = None):
     """
     Given two passages in different languages that are translations of each other, tries to get the parallel senteces between the two passages.
     
@@ -756,6 +1928,8 @@ def parallel_texts(array_one, array_two, sureness_value = 3, percent_check = 0.8
     array_two - A list of each sentence of the passage in another language
     sureness_value - How sure you want to be that two sentences are a translation of each other. Default is 3
     percent_check - How similar must the two sentences be in order to be considered translation of each other. Default is 0.8
+    window - If not None, a sentence of array_one is only searched for in the next window sentences of array_two. Default is None
+    artifacts - An AlignmentArtifacts shared by the runs on the same documents. Default is None (a new one is used)
     
     Output:
     A list of pairs of translated sentences
@@ -764,13 +1938,12 @@ def parallel_texts(array_one, array_two, sureness_value = 3, percent_check = 0.8
     counter_one = 0
     counter_two = 0
 
-    special_chars_one = []
-    special_chars_two = []
-
-    for text in array_one:
-        special_chars_one.append(get_special_chars(text))
-    for text in array_two:
-        special_chars_two.append(get_special_chars(text))
+    if artifacts is None:
+        artifacts = AlignmentArtifacts()
+    matrix = artifacts.matrix(array_one, array_two)
+    special_chars_one = matrix.strings_one
+    special_chars_two = matrix.strings_two
+    index_two = LengthIndex(special_chars_two)
 
     for i in range(min(len(special_chars_one),len(special_chars_two))):
         spaces = ""
@@ -782,13 +1955,13 @@ def parallel_texts(array_one, array_two, sureness_value = 3, percent_check = 0.8
 
     while counter_one != len(array_one) and counter_two != len(array_two):
         #if special_chars_one[counter_one] == special_chars_two[counter_two]:
-        if SequenceMatcher(None, special_chars_one[counter_one], special_chars_two[counter_two]).ratio() >= percent_check:
+        if matrix.ratio(counter_one, counter_two) >= percent_check:
             out.append([array_one[counter_one], array_two[counter_two]])
             counter_one = counter_one + 1
             counter_two = counter_two + 1
 
         else:
-            similarity = find_similar_string(special_chars_two, special_chars_one[counter_one], counter_two, percent_check)
+            similarity = find_similar_string(special_chars_two, special_chars_one[counter_one], counter_two, percent_check, index_two, window, matrix, counter_one)
             #if special_chars_one[counter_one] in special_chars_two[counter_two:]:
             if similarity != -1:
                 #similarity = special_chars_two.index(special_chars_one[counter_one], counter_two)
@@ -797,7 +1970,7 @@ def parallel_texts(array_one, array_two, sureness_value = 3, percent_check = 0.8
                         correct = 1
                         for i in range(sureness_value):
                             #if special_chars_one[counter_one + i] != special_chars_two[similarity + i]:
-                            if SequenceMatcher(None, special_chars_one[counter_one + i], special_chars_two[similarity + i]).ratio() < percent_check:
+                            if matrix.ratio(counter_one + i, similarity + i) < percent_check:
                                 correct = 0
                                 break
                         if correct == 1:
@@ -816,6 +1989,137 @@ def parallel_texts(array_one, array_two, sureness_value = 3, percent_check = 0.8
 
     return out
 
+gale_church_beads = [[1, 1, 0.89], [1, 2, 0.0445], [2, 1, 0.0445], [0, 1, 0.005], [1, 0, 0.005]]
+
+def gale_church_cost(length_one, length_two, ratio, variance = 6.8):
+    """
+    The Gale-Church cost of matching text of length_one characters with text of length_two characters.
+
+    Inputs:
+    length_one, length_two - The number of characters on each side
+    ratio - The expected number of characters of the second language per character of the first language
+    variance - The variance of that number per character. Default is 6.8 (Gale and Church's value)
+
+    Output:
+    -log of the probability of a length difference at least this large
+    """
+
+    if length_one == 0 and length_two == 0:
+        return 0
+    mean = (length_one + length_two / ratio) / 2
+    delta = abs(length_one * ratio - length_two) / math.sqrt(variance * mean)
+    probability = math.erfc(delta / math.sqrt(2))
+    if probability <= 0:
+        return 1000
+    return -math.log(probability)
+
+
+def gale_church_texts(array_one, array_two, band = 20, punctuation_weight = 4):
+    """
+    Given two passages in different languages that are translations of each other, gets the parallel sentences with a
+    Gale-Church dynamic programming aligner instead of the greedy matching of parallel_texts. Sentences are matched one
+    to one, one to two, two to one, or left out (one to zero and zero to one), and the single alignment with the lowest total
+    cost is returned. The cost of a match comes from the difference in the lengths of the two sides and from how different
+    their special characters (see get_special_chars) are. Only the cells within band of the diagonal are looked at, so
+    the run time grows linearly with the length of the passages. The band is widened to the difference in the number of
+    sentences plus 2 when that is larger, so the end of both passages can always be reached.
+
+    Inputs:
+    array_one - A list of each sentence of the passage in one language
+    array_two - A list of each sentence of the passage in another language
+    band - How far from the diagonal the alignment may stray, at least. Default is 20
+    punctuation_weight - How much the special characters count compared to the lengths. Default is 4
+
+    Output:
+    A list of pairs of translated sentences. Two sentences matched to one are joined by a space
+    """
+
+    length_one = len(array_one)
+    length_two = len(array_two)
+    if length_one == 0 or length_two == 0:
+        return []
+
+    special_chars_one = [get_special_chars(text) for text in array_one]
+    special_chars_two = [get_special_chars(text) for text in array_two]
+    ratio = sum(len(text) for text in array_two) / max(sum(len(text) for text in array_one), 1)
+    if ratio == 0:
+        ratio = 1
+
+    band = max(band, abs(length_one - length_two) + 2)
+    costs = []
+    for i in range(length_one + 1):
+        row = {}
+        center = round(i * length_two / length_one)
+        for j in range(max(0, center - band), min(length_two, center + band) + 1):
+            if i == 0 and j == 0:
+                row[j] = [0, None]
+                continue
+            best = None
+            for bead in gale_church_beads:
+                previous_i = i - bead[0]
+                previous_j = j - bead[1]
+                if previous_i < 0 or previous_j < 0:
+                    continue
+                if previous_i == i:
+                    previous = row.get(previous_j)
+                else:
+                    previous = costs[previous_i].get(previous_j)
+                if previous is None:
+                    continue
+
+                cost = gale_church_cost(sum(len(array_one[k]) for k in range(previous_i, i)),
+                                        sum(len(array_two[k]) for k in range(previous_j, j)), ratio)
+                cost = cost - math.log(bead[2]) + previous[0]
+                if bead[0] != 0 and bead[1] != 0:
+                    # quick_ratio is never below ratio, so the beads that cannot beat the best one are skipped without scoring them
+                    if best is not None and cost >= best[0]:
+                        continue
+                    matcher = SequenceMatcher(None, "".join(special_chars_one[previous_i:i]), "".join(special_chars_two[previous_j:j]))
+                    if best is not None and cost + punctuation_weight * (1 - matcher.quick_ratio()) >= best[0]:
+                        continue
+                    cost = cost + punctuation_weight * (1 - matcher.ratio())
+                if best is None or cost < best[0]:
+                    best = [cost, bead]
+            if best is not None:
+                row[j] = best
+        costs.append(row)
+
+    if length_two not in costs[length_one]:
+        return []
+
+    out = []
+    i = length_one
+    j = length_two
+    while i > 0 or j > 0:
+        bead = costs[i][j][1]
+        if bead[0] != 0 and bead[1] != 0:
+            out.append([" ".join(array_one[i - bead[0]:i]), " ".join(array_two[j - bead[1]:j])])
+        i = i - bead[0]
+        j = j - bead[1]
+    out.reverse()
+    return out
+
+
+def align_texts(array_one, array_two, sureness_value = 3, percent_check = 0.8, aligner = "greedy", artifacts = None):
+    """
+    Runs the chosen sentence aligner on two passages.
+
+    Inputs:
+    aligner - "greedy" for parallel_texts or "gale_church" for gale_church_texts, which does not use sureness_value or percent_check. Default is "greedy"
+    artifacts - An AlignmentArtifacts given to parallel_texts. Default is None
+    The other inputs are the same as parallel_texts'.
+
+    Output:
+    A list of pairs of translated sentences
+    """
+
+    if aligner == "greedy":
+        return parallel_texts(array_one, array_two, sureness_value, percent_check, artifacts = artifacts)
+    if aligner == "gale_church":
+        return gale_church_texts(array_one, array_two)
+    raise ValueError("Unknown aligner: " + str(aligner))
+
+
 def parallel_verses(ENG_lines, INA_lines):
     """
     Finds the parallel verses of two texts. Used on passages that use verses. E.g. the Bible
@@ -853,7 +2157,7 @@ def parallel_verses(ENG_lines, INA_lines):
                     break
     return out
 
-def translation(ENG_lines, INA_lines, sureness_value = 3, percent_check = 0.8):
+def translation(ENG_lines, INA_lines, sureness_value = 3, percent_check = 0.8, aligner = "greedy", artifacts = None):
     """
     Given two passages in different languages that are translations of each other, tries to get the parallel senteces between the two passages.
     
@@ -862,51 +2166,776 @@ def translation(ENG_lines, INA_lines, sureness_value = 3, percent_check = 0.8):
     array_two - A list of each paragraph of the passage in another language
     sureness_value - How sure you want to be that two sentences are a translation of each other. Default is 3
     percent_check - How similar must the two sentences be in order to be considered translation of each other. Default is 0.8
+    aligner - "greedy" to use parallel_texts or "gale_church" to use gale_church_texts (sureness_value and percent_check are then not used). Default is "greedy"
+    artifacts - An AlignmentArtifacts of these two texts, so that runs with other sureness values and percents reuse the sentences and scores. Default is None (a new one is used)
     
     Output:
     A list of pairs of translated sentences
     """
     
-    parallel_passages = parallel_texts(ENG_lines, INA_lines, sureness_value, percent_check)
+    if artifacts is None:
+        artifacts = AlignmentArtifacts()
+    parallel_passages = align_texts(ENG_lines, INA_lines, sureness_value, percent_check, aligner, artifacts)
     count = 0
     out = []
 
     for parallel_passage in parallel_passages:
-        sentences_ENG = extract_sentences(0.3,[parallel_passage[0]])[3];
-        sentences_INA = extract_sentences(0.3,[parallel_passage[1]])[3];
+        sentences_ENG = artifacts.sentences(parallel_passage[0])
+        sentences_INA = artifacts.sentences(parallel_passage[1])
 
-        parallel_sentences = parallel_texts(sentences_ENG,sentences_INA, sureness_value, percent_check)
+        parallel_sentences = align_texts(sentences_ENG,sentences_INA, sureness_value, percent_check, aligner, artifacts)
         for sentence_pair in parallel_sentences:
             out.append(sentence_pair)
     return out
 
 
-def crawler(number_of_iterations, number_of_links_per_iteration, percent = 0.4, only_ia_wiki = False, remove_all_query_urls = True):
+class Frontier:
+    """
+    The crawler's link queue. Links are kept in one queue per host and the hosts take turns, so one large
+    site does not starve the others. Adding a link, taking the next link and len are all O(1).
+
+    Inputs:
+    links - The links to start the queue with, e.g. the lines of link_queue.txt
+    journal - An open file that every append and pop is written to, so the queue can be rebuilt with load_frontier. Default is None
+    unique - If True, a link that is already in the queue is not added again, so duplicates do not use up the links of an iteration. Default is False
+    """
+
+    def __init__(self, links = (), journal = None, unique = False):
+        self.queues = {}
+        self.hosts = deque()
+        self.size = 0
+        self.journal = None
+        self.queued = set() if unique else None
+        for link in links:
+            self.append(link)
+        self.journal = journal
+
+    def append(self, link):
+        link = link.replace("\n","")
+        if self.queued is not None:
+            if link in self.queued:
+                return
+            self.queued.add(link)
+        host = urlparse(link).netloc
+        if host not in self.queues:
+            self.queues[host] = deque()
+            self.hosts.append(host)
+        self.queues[host].append(link)
+        self.size = self.size + 1
+        if self.journal is not None:
+            self.journal.write("+" + link + "\n")
+
+    def pop(self):
+        """
+        Removes and returns the next link, taking it from the host whose turn it is.
+        """
+
+        host = self.hosts[0]
+        host_queue = self.queues[host]
+        link = host_queue.popleft()
+        if len(host_queue) == 0:
+            del self.queues[host]
+            self.hosts.popleft()
+        else:
+            self.hosts.rotate(-1)
+        self.size = self.size - 1
+        if self.queued is not None:
+            self.queued.discard(link)
+        if self.journal is not None:
+            self.journal.write("-\n")
+        return link
+
+    def __len__(self):
+        return self.size
+
+    def is_empty(self):
+        return self.size == 0
+
+    def __iter__(self):
+        for host in self.hosts:
+            for link in self.queues[host]:
+                yield link
+
+
+def load_frontier(path, journal_path):
+    """
+    Rebuilds a Frontier from a saved queue and the journal of the appends and pops made since it was saved.
+    Replaying the journal gives back the same queue, in the same order, as when the journal was written.
+    A last line cut off by a crash is skipped and removed from the journal. If the crawler stopped in the middle of
+    compact_frontier, the files it left behind show whether the new queue was saved, and the matching journal is used.
+    Links that are already in the queue are not added again.
+
+    Inputs:
+    path - The name of the saved queue, e.g. "link_queue.txt"
+    journal_path - The name of the journal, e.g. "link_queue.journal"
+
+    Output:
+    The Frontier, which keeps writing to the journal
+    """
+
+    if isfile(journal_path + ".old"):
+        if isfile(path + ".tmp"):
+            os.replace(journal_path + ".old", journal_path)  # the new queue was never saved, so the old journal still applies
+        else:
+            os.remove(journal_path + ".old")
+    if isfile(path + ".tmp"):
+        os.remove(path + ".tmp")
+
+    with open(path, "r") as file:
+        frontier = Frontier(file, unique=True)
+    if isfile(journal_path):
+        end = 0
+        with open(journal_path, "rb") as journal:
+            for line in journal:
+                if not line.endswith(b"\n"):
+                    break
+                end = end + len(line)
+                line = line.decode("utf-8")
+                if line[0] == "+":
+                    frontier.append(line[1:])
+                elif line[0] == "-" and len(frontier) != 0:
+                    frontier.pop()
+        if end != os.path.getsize(journal_path):
+            with open(journal_path, "r+b") as journal:
+                journal.truncate(end)
+    frontier.journal = open(journal_path, "a")
+    return frontier
+
+
+def compact_frontier(frontier, path, journal_path):
+    """
+    Saves a journaled Frontier without its duplicate links and starts a new, empty journal.
+    The new queue is written to path.tmp and the journal is moved to journal_path.old before path.tmp replaces the
+    saved queue, so a crash at any point leaves files load_frontier can rebuild the same queue from.
+
+    Inputs:
+    frontier - The Frontier made by load_frontier
+    path - The name of the saved queue, e.g. "link_queue.txt"
+    journal_path - The name of the journal, e.g. "link_queue.journal"
+
+    Output:
+    The compacted Frontier, which writes to the new journal
+    """
+
+    links = list(OrderedDict.fromkeys(frontier))
+    with open(path + ".tmp", "w") as file:
+        for link in links:
+            file.write(link.replace("\t","") + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+    frontier.journal.close()
+    os.replace(journal_path, journal_path + ".old")
+    os.replace(path + ".tmp", path)
+    os.remove(journal_path + ".old")
+    return Frontier(links, open(journal_path, "w"), unique=True)
+
+
+class AppendOnlyLog:
+    """
+    A set of lines stored in an append-only file. A line is written to the file only the first time it is added,
+    so saving costs as much as the lines added since the last save, not the size of the whole file.
+    It can be used in place of a set (add, in and len) or of an open file (write).
+
+    Inputs:
+    path - The name of the file
+    load - If True, the lines already in the file are loaded into the set. If False, the set only holds the lines
+           added since the last compact, which is enough to keep duplicates out of the sentence files without
+           keeping them in memory. Default is True
+    """
+
+    def __init__(self, path, load = True):
+        self.path = path
+        self.load = load
+        self.lines = set()
+        if load and isfile(path):
+            with open(path, "r") as file:
+                for line in file:
+                    self.lines.add(line.replace("\n",""))
+        self.file = open(path, "a")
+
+    def add(self, line):
+        if line not in self.lines:
+            self.lines.add(line)
+            self.file.write(line + "\n")
+
+    def write(self, text):
+        self.add(text.rstrip("\n"))
+
+    def __contains__(self, line):
+        return line in self.lines
+
+    def __len__(self):
+        return len(self.lines)
+
+    def flush(self):
+        self.file.flush()
+
+    def compact(self):
+        """
+        Removes the duplicate lines from the file (lines added before the last compact are not in the set when load is False).
+        """
+
+        self.file.close()
+        remove_duplicates(self.path)
+        if not self.load:
+            self.lines = set()
+        self.file = open(self.path, "a")
+
+    def close(self):
+        self.file.close()
+
+
+class DiskFrontier:
+    """
+    A link queue stored in an SQLite database, for queues too large to keep in memory. Only a window of links
+    is paged into a Frontier at a time, and new links are written to the database in batches.
+    Taken links are deleted from the database at each checkpoint, so after a crash the crawler resumes from
+    the last checkpoint without losing or rewriting the queue.
+
+    Inputs:
+    path - The name of the database file. Default is "link_queue.db"
+    window - The maximum number of links paged into memory at once. Default is 10000
+    batch_size - The number of new links kept in memory before they are written to the database. Default is 10000
+    """
+
+    def __init__(self, path = "link_queue.db", window = 10000, batch_size = 10000):
+        self.window = window
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS links (id INTEGER PRIMARY KEY AUTOINCREMENT, link TEXT UNIQUE)")
+        self.connection.commit()
+
+        self.loaded = Frontier()
+        self.loaded_ids = {}
+        self.last_loaded_id = 0
+        self.new_links = []
+        self.taken_ids = []
+        self.size = self.connection.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+
+    def append(self, link):
+        self.new_links.append(link.replace("\n",""))
+        if len(self.new_links) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the new links to the database. Links that are already in the queue are ignored.
+        """
+
+        if len(self.new_links) == 0:
+            return
+        before = self.connection.total_changes
+        self.connection.executemany("INSERT OR IGNORE INTO links (link) VALUES (?)", [(link,) for link in self.new_links])
+        self.size = self.size + self.connection.total_changes - before
+        self.new_links = []
+
+    def load(self):
+        """
+        Pages the next window of links from the database into memory.
+        """
+
+        self.flush()
+        rows = self.connection.execute("SELECT id, link FROM links WHERE id > ? ORDER BY id LIMIT ?",
+                                       (self.last_loaded_id, self.window)).fetchall()
+        for id, link in rows:
+            self.loaded.append(link)
+            if link not in self.loaded_ids:
+                self.loaded_ids[link] = deque()
+            self.loaded_ids[link].append(id)
+            self.last_loaded_id = id
+
+    def pop(self):
+        if len(self.loaded) == 0:
+            self.load()
+        link = self.loaded.pop()
+        ids = self.loaded_ids[link]
+        self.taken_ids.append(ids.popleft())
+        if len(ids) == 0:
+            del self.loaded_ids[link]
+        self.size = self.size - 1
+        return link
+
+    def checkpoint(self):
+        """
+        Writes the new links to the database and deletes the links that have been taken since the last checkpoint.
+        """
+
+        self.flush()
+        self.connection.executemany("DELETE FROM links WHERE id = ?", [(id,) for id in self.taken_ids])
+        self.connection.commit()
+        self.taken_ids = []
+
+    def close(self):
+        self.checkpoint()
+        self.connection.close()
+
+    def __len__(self):
+        self.flush()
+        return self.size
+
+    def is_empty(self):
+        """
+        Same as len(self) == 0, but the new links are only written to the database when there are no others, so batch_size still takes effect.
+        """
+
+        if self.size == 0:
+            self.flush()
+        return self.size == 0
+
+
+class BloomFilter:
+    """
+    A scalable Bloom filter that can be used in place of a set of strings (supports add, in and len).
+    It uses about 2 bytes per item no matter how long the items are, so traversed_links and traversed_titles
+    do not grow with the length of the urls. When it is full, a new filter twice as large is added, so it never
+    has to be sized in advance. An item that was never added is reported as added with a probability of about error_rate.
+
+    Inputs:
+    capacity - The number of items the first filter holds before a larger one is added. Default is 1000000
+    error_rate - The probability that an item that was never added is reported as added. Default is 0.001
+    log_file - An open file that every newly added item is written to, one per line. Default is None
+    """
+
+    def __init__(self, capacity = 1000000, error_rate = 0.001, log_file = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.log_file = log_file
+        self.filters = []  # [bits, number of bits, number of hashes, capacity, count]
+        self.count = 0
+        self.add_filter()
+
+    def add_filter(self):
+        n = len(self.filters)
+        capacity = self.capacity * 2 ** n
+        error_rate = self.error_rate * 0.5 ** (n + 1)  # the error rates add up to at most self.error_rate
+        number_of_bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        number_of_hashes = max(1, int(round(number_of_bits / capacity * math.log(2))))
+        self.filters.append([bytearray((number_of_bits + 7) // 8), number_of_bits, number_of_hashes, capacity, 0])
+
+    def hashes(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def __contains__(self, item):
+        h1, h2 = self.hashes(item)
+        for bits, number_of_bits, number_of_hashes, capacity, count in self.filters:
+            for i in range(number_of_hashes):
+                position = (h1 + i * h2) % number_of_bits
+                if not bits[position >> 3] & (1 << (position & 7)):
+                    break
+            else:
+                return True
+        return False
+
+    def add(self, item):
+        if item in self:
+            return
+        if self.filters[-1][4] >= self.filters[-1][3]:
+            self.add_filter()
+        bits, number_of_bits, number_of_hashes = self.filters[-1][:3]
+        h1, h2 = self.hashes(item)
+        for i in range(number_of_hashes):
+            position = (h1 + i * h2) % number_of_bits
+            bits[position >> 3] |= 1 << (position & 7)
+        self.filters[-1][4] = self.filters[-1][4] + 1
+        self.count = self.count + 1
+        if self.log_file is not None:
+            self.log_file.write(item.replace("\n","").replace("\t","") + "\n")
+
+    def __len__(self):
+        return self.count
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            pickle.dump([self.capacity, self.error_rate, self.count, self.filters], file)
+
+
+def load_bloom_filter(name, log_file = None):
+    """
+    Loads the BloomFilter saved in name + ".bloom". If there is none yet, builds one from the lines of name + ".txt".
+
+    Inputs:
+    name - The name of the files without their extension, e.g. "traversed_links"
+    log_file - An open file that every newly added item is written to. Default is None
+
+    Output:
+    The BloomFilter
+    """
+
+    if isfile(name + ".bloom"):
+        seen = BloomFilter()
+        with open(name + ".bloom", "rb") as file:
+            seen.capacity, seen.error_rate, seen.count, seen.filters = pickle.load(file)
+    else:
+        seen = BloomFilter()
+        with open(name + ".txt", "r") as file:
+            for line in file:
+                seen.add(line.replace("\n",""))
+    seen.log_file = log_file
+    return seen
+
+
+def prepare_url(url, traversed_links, link_queue, only_ia_wiki = False, remove_all_query_urls = True):
+    """
+    Cleans a url taken from the queue and decides if the crawler should visit it. Urls that are visited are added to traversed_links.
+
+    Inputs:
+    url - The url taken from the link queue
+    traversed_links - The set of urls the crawler has already traversed
+    link_queue - The Frontier of links the crawler wishes to crawl in the future
+    only_ia_wiki - If True, only Interlingua wikipedia and wiktionary pages are visited. Default is False
+    remove_all_query_urls - If True, urls with a query string are not visited. Default is True
+
+    Output:
+    The cleaned url if it should be visited. Otherwise, returns None
+    """
+
+    url = url.replace("\n", "").replace(" ","%20")
+    while True:
+        length = len(url)
+        url = url[0:8] + url[8:].replace("//","/")
+        if len(url)==length:
+            break
+
+    print(url)
+
+    print("Extracting")
+    if url in traversed_links:
+        print("Link already traversed")
+        return None
+    traversed_links.add(url)
+
+    bad_links = ["action=edit", "&oldid", "&mobileaction=","upload.wikimedia.org", "&returnto=", "&section=", "Special:","&diff","File:", "#cite_ref","#cite_ref-ref", ".mp3","peoplescheck", "tennis.com", "thegymter.net", "www.mindat.org","24h.md",".ro/", "ziare.com"]
+    bad_wiki_parts = ["?","&","="]
+
+    is_bad_link = 0
+
+    if(url.find(".m.wikipedia")!=-1):
+        is_bad_link = 1
+        link_queue.append(url.replace(".m.wikipedia",".wikipedia",1) + "\n")
+
+    for bad_link in bad_links:
+        if(url.find(bad_link)!=-1):
+            is_bad_link = 1
+        if(only_ia_wiki and (url.find("wikipedia")!=-1 or url.find("wiktionary")!=-1) and (url.lower().find("//ia.")==-1 and url.lower().find("interlingua")==-1)):
+            is_bad_link = 1
+
+    if(url.find("wiki")!=-1):
+        for bad in bad_wiki_parts:
+            if(url.find(bad)!=-1):
+                is_bad_link = 1
+
+    remove_query = ["&","="]
+    if remove_all_query_urls:
+        for bad in remove_query:
+            if(url.find(bad)!=-1):
+                is_bad_link = 1
+
+    if is_bad_link == 1:
+        print("Bad link.")
+        return None
+    return url
+
+
+def is_document_url(url):
+    """
+    Returns True if the url is a pdf or a txt file rather than a website.
+    """
+
+    return url.find(".pdf")!=-1 or url.find(".txt")!=-1
+
+
+def write_sentences(sentences, url_tag, url, sentences_file, sentences_file_non):
+    """
+    Writes the output of extract_sentences to the Interlingua and non-Interlingua sentence files.
+    """
+
+    for sentence in sentences[0]:
+        sentences_file.write(sentence + " || " + url_tag + " || " + url + "\n")
+    if sentences[1] != -1:
+        for sentence in sentences[1]:
+            sentences_file_non.write(sentence + " || " + url_tag + " || " + url + "\n")
+    print("Number of IA Sentences:", len(sentences[0]))
+
+
+def parse_url(url, source, percent, traversed_titles = None, connect_timeout = 10, read_timeout = 30, parse_timeout = 30,
+              pdf_workers = 0, min_parallel_pages = 100):
+    """
+    Extracts the sentences of one url. Does not change any of the crawler's state, so it can run in a worker process.
+
+    Inputs:
+    url - The url of the page
+    source - The downloaded body of the page. If None, the page is downloaded here.
+    percent - Used for the variable fraction in extract_sentences and variable fraction in checkForLanguage
+    traversed_titles - If the page's title is in this set, the sentences are not extracted. Default is None
+    connect_timeout - The connect_timeout used when downloading the page (see fetch_page). Default is 10
+    read_timeout - Seconds the body of the page may take to download. Default is 30
+    parse_timeout - Seconds the page may take to be parsed once it is downloaded. It is checked while the page is walked,
+    split into sentences and checked for the language. If the time runs out after the sentences are extracted, they are kept
+    and the links are not followed. If building the soup alone takes longer, the sentences still get their own parse_timeout
+    seconds to be extracted, but the links are not followed. Default is 30
+    pdf_workers, min_parallel_pages - Same as get_pdf_text's. Default is 0 and 100
+
+    Output:
+    A list of [url tag, title (None for pdf and txt files), output of extract_sentences (None if the title is in traversed_titles),
+    True if the page is in Interlingua, links to add to the queue]
+    """
+
+    if url.find(".pdf")!=-1:
+        print("This is a pdf")
+        lines = get_pdf_text(url, True, connect_timeout, read_timeout, parse_timeout, pdf_workers=pdf_workers, min_parallel_pages=min_parallel_pages)
+        sentences = extract_sentences(0.3, lines, deadline=Deadline(parse_timeout, "Extracting sentences"))
+        return ["pdf", None, sentences, sentences[2], []]
+    elif url.find(".txt")!=-1:
+        print("This is a text file")
+        lines = text_from_txt(url, True, connect_timeout, read_timeout)
+        sentences = extract_sentences(0.3, lines, deadline=Deadline(parse_timeout, "Extracting sentences"))
+        return ["text", None, sentences, sentences[2], []]
+    else:
+        print("This is a website")
+        if source is None:
+            source = fetch_page(url, connect_timeout, read_timeout)
+        deadline = Deadline(parse_timeout, "Parsing")
+        soup = bs.BeautifulSoup(source, 'lxml')
+        follow_links = True
+        if deadline.expired():
+            print("Parsing took over", parse_timeout, "seconds, the links are not followed")
+            deadline = Deadline(parse_timeout, "Extracting sentences")  # the page is already downloaded and parsed, so it is not thrown away
+            follow_links = False
+
+        title = soup.find('title')
+        title = title.getText()
+
+        linebreaks = ["\r\n","\r","\n"]
+        for breaks in linebreaks:
+            title = title.replace(breaks,"")
+
+        print("Title:", title)
+        if traversed_titles is not None and title in traversed_titles:
+            return ["website", title, None, False, []]
+
+        sentences = extract_sentences(percent,get_paragraphs(soup, deadline), deadline=deadline)
+        if not follow_links:
+            return ["website", title, sentences, False, []]
+        try:
+            is_language = checkForLanguage("__label__INA",percent,soup, deadline=deadline)
+        except TimeoutException:
+            print("Parsing took over", parse_timeout, "seconds, the links are not followed")
+            return ["website", title, sentences, False, []]
+        if is_language:
+            return ["website", title, sentences, True, get_links(soup, url)]
+        return ["website", title, sentences, False, []]
+
+
+def store_page(url, page, link_dict, traversed_links, traversed_titles, link_queue, sentences_file, sentences_file_non):
+    """
+    Stores the sentences parse_url found on a url and adds the links of Interlingua websites to the link queue.
+
+    Inputs:
+    url - The url of the page
+    page - The output of parse_url, or ResponseCache.page
+    The remaining inputs are the crawler's state and open sentence files.
+
+    Output:
+    Void
+    """
+
+    url_tag, title, sentences, is_language, links = page
+
+    index_period = url.rfind(".")
+    index_slash = url.find("/",index_period)
+    if(index_slash!=-1):
+        type = url[index_period:index_slash]
+    else:
+        type = url[index_period:]
+
+    if type in link_dict:
+        link_dict[type] = link_dict[type] + 1
+    else:
+        link_dict[type] = 1
+
+    if title is not None:
+        if title in traversed_titles:
+            print("Title already traversed!")
+            return
+        traversed_titles.add(title)
+
+    if sentences is not None:  # None if the page was in the ResponseCache
+        write_sentences(sentences, url_tag, url, sentences_file, sentences_file_non)
+    if not is_language:
+        print("Not interlingua!")
+    else:
+        print("Success!")
+
+    for link in links:
+        if link not in traversed_links:
+            link_queue.append(link + "\n")
+
+
+def process_url(url, source, percent, link_dict, traversed_links, traversed_titles, link_queue, sentences_file, sentences_file_non,
+                connect_timeout = 10, read_timeout = 30, parse_timeout = 30, response_cache = None, pdf_workers = 0, min_parallel_pages = 100):
+    """
+    Extracts and stores the sentences of one url, and adds the links of Interlingua websites to the link queue.
+
+    Inputs:
+    url - The url of the page
+    source - The response of the page (the output of fetch_response). If None, the page is downloaded here.
+    percent - Used for the variable fraction in extract_sentences and variable fraction in checkForLanguage
+    connect_timeout, read_timeout, parse_timeout - The time limits of parse_url
+    response_cache - A ResponseCache. Websites that have not changed since they were stored in it are not parsed again. Default is None
+    pdf_workers, min_parallel_pages - Same as get_pdf_text's. Default is 0 and 100
+    The remaining inputs are the crawler's state and open sentence files.
+
+    Output:
+    Void
+    """
+
+    if source is None and not is_document_url(url):
+        headers = response_cache.headers(url) if response_cache is not None else None
+        source = fetch_response(url, connect_timeout, read_timeout, headers)
+
+    page = None
+    if response_cache is not None and source is not None:
+        page = response_cache.page(url, source)
+        if page is not None:
+            print("Not modified")
+    if page is None:
+        page = parse_url(url, None if source is None else source[2], percent, traversed_titles, connect_timeout, read_timeout, parse_timeout,
+                         pdf_workers, min_parallel_pages)
+        if response_cache is not None and source is not None:
+            response_cache.store(url, source, page)
+    store_page(url, page, link_dict, traversed_links, traversed_titles, link_queue, sentences_file, sentences_file_non)
+
+
+def record_failure(failed_links, url, exc_type, exc_value):
+    """
+    Records a url that could not be processed in failedWebsites.txt, unless it is a common HTTP error.
+    """
+
+    if exc_type is TimeoutException:
+        print("Timeout Exception")
+        failed_links.write(url + " -> " + "Timeout Exception" + ": " + str(exc_value) + "\n")
+        return
+
+    print( "Error:", repr(exc_type))
+
+    fails = ["HTTP Error 403: Forbidden", "HTTP Error 410: Gone", "HTTP Error 404: Not Found",
+             "HTTP Error 400: Bad Request"]
+    if str(exc_value) not in fails:
+        failed_links.write(url + " -> " + str(exc_type) + ": " + str(exc_value) + "\n")
+
+
+def crawl_url(url, source, percent, link_dict, traversed_links, traversed_titles, link_queue, sentences_file, sentences_file_non, failed_links,
+              connect_timeout = 10, read_timeout = 30, parse_timeout = 30, response_cache = None, pdf_workers = 0, min_parallel_pages = 100):
+    """
+    Runs process_url on a url and records the url in failedWebsites.txt if it fails or runs out of time.
+
+    Inputs:
+    source - The response of the page (the output of fetch_response), None if it has not been downloaded, or the exception raised while downloading it.
+    The other inputs are the same as process_url's.
+
+    Output:
+    Void
+    """
+
+    try:
+        if isinstance(source, Exception):
+            raise source
+        process_url(url, source, percent, link_dict, traversed_links, traversed_titles, link_queue, sentences_file, sentences_file_non,
+                    connect_timeout, read_timeout, parse_timeout, response_cache, pdf_workers, min_parallel_pages)
+    except Exception:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        record_failure(failed_links, url, exc_type, exc_value)
+
+
+def start_process_pool(workers, initializer = None, initargs = ()):
+    """
+    Starts a ProcessPoolExecutor and waits until its worker processes have been forked. ProcessPoolExecutor only forks
+    them on the first submit, so a pool made before other threads are started could still be forked while those
+    threads hold locks (such as http_client_lock), which the workers would then wait on forever.
+
+    Inputs:
+    workers - The number of worker processes
+    initializer, initargs - Same as ProcessPoolExecutor's. Default is None and ()
+
+    Output:
+    The ProcessPoolExecutor
+    """
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+    wait([pool.submit(os.getpid) for i in range(workers)])
+    return pool
+
+
+def parse_url_in_worker(url, source, percent, connect_timeout = 10, read_timeout = 30, parse_timeout = 30):
+    """
+    Runs parse_url in a worker process of the crawler's ProcessPoolExecutor.
+    The language model is already loaded in every worker, since importing this file loads it.
+    Pdfs are laid out in the worker itself, without pdf workers of its own.
+
+    Output:
+    A list of [the output of parse_url (None if it failed), the type of the exception if it failed, the exception's message]
+    """
+
+    try:
+        page = parse_url(url, source, percent, None, connect_timeout, read_timeout, parse_timeout)
+    except Exception:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        return [None, exc_type, str(exc_value)]
+    return [page, None, None]
+
+
+def crawler(number_of_iterations, number_of_links_per_iteration, percent = 0.4, only_ia_wiki = False, remove_all_query_urls = True, async_fetch = False, max_connections = 200, max_connections_per_host = 8, disk_frontier = False, bloom_filter = False, append_only = False, compact_every = 10, language_cache_file = None, parse_workers = 0,
+            connect_timeout = 10, read_timeout = 30, parse_timeout = 30, response_cache_dir = None, pdf_workers = 0, min_parallel_pages = 100):
     """
     A webcrawler that will crawl and store any Interlingua sentences it finds.
-    
+
     Files:
     traversed_links.txt - Stores what links the crawler has traversed so far
     link_queue.txt - The queue of links the crawler wishes to crawl in the future
+    link_queue.db - The queue of links when disk_frontier is True
+    link_queue.journal - The appends and pops made to the queue since link_queue.txt was last saved, when append_only is True
     sentencesINA.txt - Stores all of the Interlingua sentences the crawlers finds
     sentencesNonINA.txt - Stores all of the non-Interlingua sentences the crawler finds
     failedWebsites.txt - Websites that either took too long to load or was given an error
     failedWebsites.txt - Stores the number of each url type the crawler has been to (.com, .org, .pdf, etc)
-    
+
     Inputs:
     number_of_iterations - Number of times you want to run the crawler
     number_of_links_per_iteration - Number of links you want to go threw per iteration
     percent - Used for the variable fraction in extract_sentences and variable fraction in checkForLanguage
+    async_fetch - If True, websites are downloaded concurrently by a PageFetcher while the pages that have already arrived are processed. Default is False
+    max_connections - The maximum number of downloads in flight when async_fetch is True. Default is 200
+    max_connections_per_host - The maximum number of downloads in flight to a single host when async_fetch is True. Default is 8
+    disk_frontier - If True, the link queue is kept in link_queue.db (a DiskFrontier) instead of being read from and rewritten to link_queue.txt every iteration. link_queue.txt is only used to fill link_queue.db the first time. Default is False
+    bloom_filter - If True, traversed_links and traversed_titles are BloomFilters saved in traversed_links.bloom and traversed_titles.bloom, and new links and titles are appended to the txt files instead of rewriting them. A small fraction of links (about 0.1%) are then wrongly skipped as already traversed. Default is False
+    append_only - If True, the files are loaded once and only the new links, titles, queue changes and sentences are appended to them at the end of each iteration, instead of rewriting every file and removing its duplicates. A link that is already in the queue is not queued again. Default is False
+    compact_every - When append_only is True, every compact_every iterations (and after the last one) link_queue.txt is rewritten from the queue and the duplicates are removed from the sentence files. Default is 10
+    language_cache_file - A file the LanguageCache is loaded from at the start and saved to after every iteration, so predictions are kept between runs. Default is None
+    parse_workers - If more than 0, pages are downloaded as with async_fetch and parsed, split into sentences and classified by that many worker processes, while this process only manages the queue and the files. Default is 0
+    connect_timeout - Seconds to wait for a server to connect, and for each piece of a page while it downloads. Default is 10
+    read_timeout - Seconds a page may take to download. Default is 30
+    parse_timeout - Seconds a downloaded page may take to be parsed and classified. With parse_workers, a page a worker has not
+    finished after 2 * (connect_timeout + read_timeout + 2 * parse_timeout) seconds is recorded as failed. Default is 30
+    response_cache_dir - A directory for a ResponseCache of the websites the crawler downloads. When they are crawled
+    again, they are only downloaded if the server says they have changed, and they are not parsed again if they have not. Default is None
+    pdf_workers - If more than 0, pdfs with at least min_parallel_pages pages are laid out by this many worker processes
+    (see get_pdf_text). It is ignored with parse_workers, whose workers lay out pdfs themselves, since a pool started
+    in a worker would be left running when the worker exits and keep the crawler from exiting. Default is 0
+    min_parallel_pages - Pdfs with fewer pages are laid out by the process that parses them. Default is 100
     """
-    
-    signal.signal(signal.SIGALRM, timeout_handler)
+
+    global language_cache
+    if language_cache_file is not None:
+        language_cache = LanguageCache(path=language_cache_file)
+    response_cache = ResponseCache(response_cache_dir) if response_cache_dir is not None else None
+    if pdf_workers > 0 and parse_workers == 0:
+        start_pdf_pool(pdf_workers)  # forked before the fetcher starts its threads
 
     for j in range(number_of_iterations):
         start = time.time()
-        traversed_links_file = open("traversed_links.txt", "r")
-        links_file = open("link_queue.txt", "r")
-        sentences_file = open("sentencesINA.txt", "a")
-        sentences_file_non = open("sentencesNonINA.txt", "a")
         failed_links = open("failedWebsites.txt", "a")
 
         link_dict = {}
@@ -916,243 +2945,358 @@ def crawler(number_of_iterations, number_of_links_per_iteration, percent = 0.4,
             temp = element.split(" ")
             link_dict[temp[0]] = int(temp[1])
 
-        traversed_links = traversed_links_file.readlines()
-        for i in range(len(traversed_links)):
-            traversed_links[i] = traversed_links[i].replace("\n","")
-
-        traversed_links = set(traversed_links)
-        link_queue = links_file.readlines()
-
-        traversed_titles_file = open("traversed_titles.txt", "r")
-        traversed_titles = traversed_titles_file.readlines()
-        for i in range(len(traversed_titles)):
-            traversed_titles[i] = traversed_titles[i].replace("\n","")
-        traversed_titles = set(traversed_titles)
-
-        for i in range(number_of_links_per_iteration):
-            signal.alarm(0)
-            print("URL Number", i)
-            if len(link_queue) != 0:
-                url = link_queue.pop(0)
+        if j == 0 or not append_only:
+            if bloom_filter:
+                traversed_links = load_bloom_filter("traversed_links", open("traversed_links.txt", "a"))
+                traversed_titles = load_bloom_filter("traversed_titles", open("traversed_titles.txt", "a"))
+            elif append_only:
+                traversed_links = AppendOnlyLog("traversed_links.txt")
+                traversed_titles = AppendOnlyLog("traversed_titles.txt")
+            else:
+                traversed_links_file = open("traversed_links.txt", "r")
+                traversed_links = traversed_links_file.readlines()
+                for i in range(len(traversed_links)):
+                    traversed_links[i] = traversed_links[i].replace("\n","")
+                traversed_links = set(traversed_links)
+                traversed_links_file.close()
+
+                traversed_titles_file = open("traversed_titles.txt", "r")
+                traversed_titles = traversed_titles_file.readlines()
+                for i in range(len(traversed_titles)):
+                    traversed_titles[i] = traversed_titles[i].replace("\n","")
+                traversed_titles = set(traversed_titles)
+                traversed_titles_file.close()
+
+            if disk_frontier:
+                new_database = not isfile("link_queue.db")
+                link_queue = DiskFrontier("link_queue.db")
+                if new_database:
+                    links_file = open("link_queue.txt", "r")
+                    for link in links_file:
+                        link_queue.append(link)
+                    links_file.close()
+                    link_queue.checkpoint()
+            elif append_only:
+                link_queue = load_frontier("link_queue.txt", "link_queue.journal")
+            else:
+                links_file = open("link_queue.txt", "r")
+                link_queue = Frontier(links_file.readlines())
+                links_file.close()
 
-                url = url.replace("\n", "").replace(" ","%20")
-                while True:
-                    length = len(url)
-                    url = url[0:8] + url[8:].replace("//","/")
-                    if len(url)==length:
-                        break
+            if append_only:
+                sentences_file = AppendOnlyLog("sentencesINA.txt", False)
+                sentences_file_non = AppendOnlyLog("sentencesNonINA.txt", False)
+            else:
+                sentences_file = open("sentencesINA.txt", "a")
+                sentences_file_non = open("sentencesNonINA.txt", "a")
+
+        if not async_fetch and parse_workers == 0:
+            for i in range(number_of_links_per_iteration):
+                print("URL Number", i)
+                if not link_queue.is_empty():
+                    url = prepare_url(link_queue.pop(), traversed_links, link_queue, only_ia_wiki, remove_all_query_urls)
+                    if url is not None:
+                        crawl_url(url, None, percent, link_dict, traversed_links, traversed_titles, link_queue,
+                                  sentences_file, sentences_file_non, failed_links, connect_timeout, read_timeout, parse_timeout, response_cache,
+                                  pdf_workers, min_parallel_pages)
+                    print("---------")
+                else:
+                    print("Queue empty!")
+                    break
+        else:
+            if parse_workers > 0:
+                pool = start_process_pool(parse_workers)  # forked before the fetcher starts its threads
+            fetcher = PageFetcher(max_connections, max_connections_per_host, connect_timeout, read_timeout)
+            parsing = {}  # the pages the workers are parsing, future -> [url, response, when it was submitted]
+            # a worker's own deadlines end its work, so a page that takes much longer than them is given up on
+            worker_timeout = 2 * (connect_timeout + read_timeout + 2 * parse_timeout)
+            i = 0
+            while True:
+                for future in [future for future in parsing if not future.done() and time.monotonic() - parsing[future][2] > worker_timeout]:
+                    url, source, submitted = parsing.pop(future)
+                    future.cancel()
+                    record_failure(failed_links, url, TimeoutException, "Parsing in a worker took over " + str(worker_timeout) + " seconds")
+                    print("---------")
+
+                for future in [future for future in parsing if future.done()]:
+                    url, source, submitted = parsing.pop(future)
+                    print("Storing", url)
+                    try:
+                        page, exc_type, exc_value = future.result()
+                    except Exception:
+                        page = None
+                        exc_type, exc_value, exc_traceback = sys.exc_info()
+                    if page is None:
+                        record_failure(failed_links, url, exc_type, exc_value)
+                    else:
+                        store_page(url, page, link_dict, traversed_links, traversed_titles, link_queue, sentences_file, sentences_file_non)
+                        if response_cache is not None and source is not None:
+                            response_cache.store(url, source, page)
+                    print("---------")
+
+                while i < number_of_links_per_iteration and fetcher.in_flight < max_connections and not link_queue.is_empty():
+                    print("URL Number", i)
+                    i = i + 1
+                    url = prepare_url(link_queue.pop(), traversed_links, link_queue, only_ia_wiki, remove_all_query_urls)
+                    if url is not None:
+                        fetcher.submit(url, not is_document_url(url), response_cache.headers(url) if response_cache is not None else None)
+                    print("---------")
+
+                if fetcher.in_flight == 0 and len(parsing) == 0:
+                    if i < number_of_links_per_iteration:
+                        print("Queue empty!")
+                    break
 
-                print(url)
-
-                print("Extracting")
-                if url not in traversed_links:
-                    signal.alarm(0)
-                    signal.alarm(30)
-                    traversed_links.add(url)
-
-                    bad_links = ["action=edit", "&oldid", "&mobileaction=","upload.wikimedia.org", "&returnto=", "&section=", "Special:","&diff","File:", "#cite_ref","#cite_ref-ref", ".mp3","peoplescheck", "tennis.com", "thegymter.net", "www.mindat.org","24h.md",".ro/", "ziare.com"]
-                    bad_wiki_parts = ["?","&","="]
-
-                    is_bad_link = 0
-
-                    if(url.find(".m.wikipedia")!=-1):
-                        is_bad_link = 1
-                        link_queue.append(url.replace(".m.wikipedia",".wikipedia",1) + "\n")
-
-                    for bad_link in bad_links:
-                        if(url.find(bad_link)!=-1):
-                            is_bad_link = 1
-                        if(only_ia_wiki and (url.find("wikipedia")!=-1 or url.find("wiktionary")!=-1) and (url.lower().find("//ia.")==-1 and url.lower().find("interlingua")==-1)):
-                            is_bad_link = 1
-
-                    if(url.find("wiki")!=-1):
-                        for bad in bad_wiki_parts:
-                            if(url.find(bad)!=-1):
-                                is_bad_link = 1
-                                
-                    remove_query = ["&","="]
-                    if remove_all_query_urls:
-                        for bad in remove_query:
-                            if(url.find(bad)!=-1):
-                                is_bad_link = 1
-
-                    if is_bad_link == 0:
-                        try:
-                            url_tag = ""
-
-                            index_period = url.rfind(".")
-                            index_slash = url.find("/",index_period)
-                            if(index_slash!=-1):
-                                type = url[index_period:index_slash]
-                            else:
-                                type = url[index_period:]
-
-                            if type in link_dict:
-                                link_dict[type] = link_dict[type] + 1
-                            else:
-                                link_dict[type] = 1
-
-                            if url.find(".pdf")!=-1:
-                                print("This is a pdf")
-                                url_tag = "pdf"
-                                sentences =  extract_sentences(0.3,get_pdf_text(url))
-
-                                if not sentences[2]:
-                                    for sentence in sentences[0]:
-                                        sentences_file.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                    if sentences[1] != -1:
-                                        for sentence in sentences[1]:
-                                            sentences_file_non.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                    print("Number of IA Sentences:", len(sentences[0]))
-                                    print("Not interlingua!")
-
-                                else:
-                                    for sentence in sentences[0]:
-                                        sentences_file.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                    if sentences[1] != -1:
-                                        for sentence in sentences[1]:
-                                            sentences_file_non.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                    print("Number of IA Sentences:", len(sentences[0]))
-                                    print("Success!")
-                            elif url.find(".txt")!=-1:
-                                print("This is a text file")
-                                url_tag = "text"
-                                lines = text_from_txt(url)
-                                sentences = extract_sentences(0.3, lines)
-
-                                if not sentences[2]:
-                                    for sentence in sentences[0]:
-                                        sentences_file.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                    if sentences[1] != -1:
-                                        for sentence in sentences[1]:
-                                            sentences_file_non.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                    print("Number of IA Sentences:", len(sentences[0]))
-                                    print("Not interlingua!")
-
-                                else:
-                                    for sentence in sentences[0]:
-                                        sentences_file.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                    if sentences[1] != -1:
-                                        for sentence in sentences[1]:
-                                            sentences_file_non.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                    print("Number of IA Sentences:", len(sentences[0]))
-                                    print("Success!")
-                            else:
-                                print("This is a website")
-                                url_tag = "website"
-                                soup = get_soup(url)
-
-                                title = soup.find('title')
-                                title = title.getText()
-
-                                linebreaks = ["\r\n","\r","\n"]
-                                for breaks in linebreaks:
-                                    title = title.replace(breaks,"")
-
-                                print("Title:", title)
-                                if title in traversed_titles:
-                                    print("Title already traversed!")
-                                else:
-                                    traversed_titles.add(title)
-                                    sentences = extract_sentences(percent,get_paragraphs(soup))
-
-                                    #
-                                    # nt("=========================")
-
-                                    if not checkForLanguage("__label__INA",percent,soup):
-                                        for sentence in sentences[0]:
-                                            sentences_file.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                        if sentences[1] != -1:
-                                            for sentence in sentences[1]:
-                                                sentences_file_non.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                        print("Number of IA Sentences:", len(sentences[0]))
-                                        print("Not interlingua!")
-
-                                    else:
-                                        for sentence in sentences[0]:
-                                            sentences_file.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                        if sentences[1] != -1:
-                                            for sentence in sentences[1]:
-                                                sentences_file_non.write(sentence + " || " + url_tag + " || " + url + "\n")
-                                        print("Number of IA Sentences:", len(sentences[0]))
-                                        print("Success!")
-
-                                        links = get_links(soup, url)
-                                        for link in links:
-                                            if link not in traversed_links:
-                                                link_queue.append(link + "\n")
-                        except TimeoutException:
-                            print("Timeout Exception")
-                            print("---------")
-                            failed_links.write(url + " -> " + "Timeout Exception" + ": " + "Link took over 30 second to be processed" + "\n")
-                            continue
-                        except Exception as e:
-                            signal.alarm(0)
-                            exc_type, exc_value, exc_traceback = sys.exc_info()
-                            traversed_links.add(url)
-                            e = sys.exc_info()[0]
-                            print( "Error:", repr(e))
-
-                            fails = ["HTTP Error 403: Forbidden", "HTTP Error 410: Gone", "HTTP Error 404: Not Found",
-                                     "HTTP Error 400: Bad Request"]
-                            if str(exc_value) not in fails:
-                                failed_links.write(url + " -> " + str(exc_type) + ": " + str(exc_value) + "\n")
-                            pass
-                        else:
-                            signal.alarm(0)
+                if fetcher.in_flight != 0 and (parse_workers == 0 or len(parsing) < 2 * parse_workers):
+                    url, source = fetcher.get()
+                    if parse_workers == 0:
+                        print("Processing", url)
+                        crawl_url(url, source, percent, link_dict, traversed_links, traversed_titles, link_queue,
+                                  sentences_file, sentences_file_non, failed_links, connect_timeout, read_timeout, parse_timeout, response_cache,
+                                  pdf_workers, min_parallel_pages)
+                        print("---------")
+                    elif isinstance(source, Exception):
+                        record_failure(failed_links, url, type(source), source)
                     else:
-                        print("Bad link.")
+                        page = response_cache.page(url, source) if response_cache is not None and source is not None else None
+                        if page is not None:
+                            print("Not modified", url)
+                            store_page(url, page, link_dict, traversed_links, traversed_titles, link_queue, sentences_file, sentences_file_non)
+                        else:
+                            parsing[pool.submit(parse_url_in_worker, url, None if source is None else source[2], percent,
+                                                connect_timeout, read_timeout, parse_timeout)] = [url, source, time.monotonic()]
                 else:
-                    print("Link already traversed")
-                print("---------")
-            else:
-                print("Queue empty!")
-                break
+                    oldest = min(page[2] for page in parsing.values())
+                    wait(parsing, timeout=max(oldest + worker_timeout - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            fetcher.close()
+            if parse_workers > 0:
+                pool.shutdown(wait=False, cancel_futures=True)  # does not wait for the pages that were given up on
 
-        signal.alarm(0)
         link_dict = sorted(link_dict.items(), key=lambda x: x[1], reverse=True)
         print(link_dict)
+        print(language_cache)
+        language_cache.save()
+        if response_cache is not None:
+            response_cache.commit()
 
-        traversed_links_file.close()
-        links_file.close()
         link_types.close()
-        sentences_file.close()
-        sentences_file_non.close()
-        traversed_links_file = open("traversed_links.txt", "w")
-        links_file = open("link_queue.txt", "w")
-        traversed_titles_file = open("traversed_titles.txt", "w")
+        failed_links.close()
+        last_iteration = not append_only or j == number_of_iterations - 1
+        compact = append_only and ((j + 1) % compact_every == 0 or j == number_of_iterations - 1)
 
         # link_types = open("link_dict.txt", "w")
 
-        for link in traversed_links:
-            link = link.replace("\n","")
-            link = link.replace("\t","")
-            traversed_links_file.write(link + "\n")
-
-        for link in link_queue:
-            link = link.replace("\n","")
-            link = link.replace("\t","")
-            links_file.write(link + "\n")
-
-        for title in traversed_titles:
-            title = title.replace("\n","")
-            title = title.replace("\t","")
-            traversed_titles_file.write(title + "\n")
+        if bloom_filter:
+            traversed_links.save("traversed_links.bloom")
+            traversed_titles.save("traversed_titles.bloom")
+            traversed_links.log_file.flush()
+            traversed_titles.log_file.flush()
+            if last_iteration:
+                traversed_links.log_file.close()
+                traversed_titles.log_file.close()
+        elif append_only:
+            traversed_links.flush()
+            traversed_titles.flush()
+            if last_iteration:
+                traversed_links.close()
+                traversed_titles.close()
+        else:
+            traversed_links_file = open("traversed_links.txt", "w")
+            for link in traversed_links:
+                link = link.replace("\n","")
+                link = link.replace("\t","")
+                traversed_links_file.write(link + "\n")
+            traversed_links_file.close()
+
+            traversed_titles_file = open("traversed_titles.txt", "w")
+            for title in traversed_titles:
+                title = title.replace("\n","")
+                title = title.replace("\t","")
+                traversed_titles_file.write(title + "\n")
+            traversed_titles_file.close()
+
+        if disk_frontier:
+            link_queue.checkpoint()
+            if last_iteration:
+                link_queue.close()
+        elif append_only:
+            link_queue.journal.flush()
+            if compact:
+                link_queue = compact_frontier(link_queue, "link_queue.txt", "link_queue.journal")
+            if last_iteration:
+                link_queue.journal.close()
+        else:
+            links_file = open("link_queue.txt", "w")
+            for link in link_queue:
+                link = link.replace("\n","")
+                link = link.replace("\t","")
+                links_file.write(link + "\n")
+            links_file.close()
+            remove_duplicates("link_queue.txt")
 
         # for link_type in link_dict:
             # link_types.write(link_type[0] + " " + str(link_type[1]) + "\n")
 
-        remove_duplicates("sentencesINA.txt")
-        remove_duplicates("sentencesNonINA.txt")
+        if append_only:
+            sentences_file.flush()
+            sentences_file_non.flush()
+            if compact:
+                sentences_file.compact()
+                sentences_file_non.compact()
+            if last_iteration:
+                sentences_file.close()
+                sentences_file_non.close()
+        else:
+            sentences_file.close()
+            sentences_file_non.close()
+            remove_duplicates("sentencesINA.txt")
+            remove_duplicates("sentencesNonINA.txt")
 
-        traversed_links_file.close()
-        links_file.close()
-        link_types.close()
+    if response_cache is not None:
+        response_cache.close()
+    close_pdf_pool()
+
+
+def filter_verse_pairs(pairs):
+    """
+    Removes the pairs whose verse numbers do not match. Pairs without a verse number are kept if the last pair with one matched.
+
+    Inputs:
+    pairs - A list of pairs of translated sentences
 
-        remove_duplicates("link_queue.txt")
+    Output:
+    The pairs that are kept
+    """
+
+    correct_verse_pairs = []
+    correct = 1
+    for pair in pairs:
+        first_colon = pair[0].find(":")
+        if first_colon != -1 and pair[0][first_colon-1].isdigit() and pair[0][first_colon+1].isdigit:
+            start = first_colon - 1
+            while start >= 0:
+                if not pair[0][start].isdigit():
+                    break
+                start = start - 1
+            start = start + 1
+
+            end = first_colon + 1
+            while end < len(pair[0]):
+                if not pair[0][end].isdigit():
+                    break
+                end = end + 1
+
+            verse_number = pair[0][start:end]
+
+            if pair[1].find(verse_number) != -1:
+                correct = 1
+                correct_verse_pairs.append(pair)
+            else:
+                correct = 0
+        else:
+            if correct == 1:
+                correct_verse_pairs.append(pair)
+
+    return correct_verse_pairs
+
+
+translation_grid = [[i + 3, round(0.6 + j*0.025,3)] for i in range(8) for j in range(11)]
+
+def run_translation_config(ENG_lines, INA_lines, sureness, percent, has_verse_pairs = False, artifacts = None):
+    """
+    Runs translation for one sureness value and percent of the grid in parallel_sentences_extractor.
+
+    Inputs:
+    has_verse_pairs - If True, the pairs are passed through filter_verse_pairs. Default is False
+    artifacts - The AlignmentArtifacts of the two texts. Default is None
+    The other inputs are the same as translation's.
+
+    Output:
+    [sureness, percent, the pairs, the number of seconds it took]
+    """
 
+    start = time.time()
+    pairs = translation(ENG_lines, INA_lines, sureness, percent, artifacts = artifacts)
+    if has_verse_pairs:
+        pairs = filter_verse_pairs(pairs)
+    return [sureness, percent, pairs, time.time() - start]
 
-def parallel_sentences_extractor(save_dir, save_name, pair_dir, pair_list, IA_file_name = "_IA.txt", EN_file_name = "_EN.txt", only_get_verse_pairs = False, has_verse_pairs = False, passages = True):
+
+worker_translation_lines = None
+
+def set_translation_lines_in_worker(ENG_lines, INA_lines):
+    """
+    Initializer of the worker processes of sweep_translation_grid. The lines are sent once per worker instead of once
+    per configuration, and each worker keeps one AlignmentArtifacts for all of the configurations it runs.
+    """
+
+    global worker_translation_lines
+    worker_translation_lines = [ENG_lines, INA_lines, AlignmentArtifacts()]
+
+
+def run_translation_config_in_worker(sureness, percent, has_verse_pairs):
+    """
+    Runs run_translation_config on the lines given to set_translation_lines_in_worker.
+    """
+
+    return run_translation_config(worker_translation_lines[0], worker_translation_lines[1], sureness, percent, has_verse_pairs, worker_translation_lines[2])
+
+
+def sweep_translation_grid(ENG_lines, INA_lines, has_verse_pairs = False, workers = 0, early_stop = False):
+    """
+    Runs translation for every sureness value (3 to 10) and percent (0.6 to 0.85) and keeps the pairs of the one with the
+    most pairs. Ties go to the configuration with the higher sureness value and percent.
+
+    Inputs:
+    ENG_lines - A list of the English paragraphs
+    INA_lines - A list of the Interlingua paragraphs
+    has_verse_pairs - If True, the pairs of each configuration are passed through filter_verse_pairs. Default is False
+    workers - The number of worker processes the configurations are spread over. If 0, they are run one after another here. Default is 0
+    early_stop - If True, the sweep stops at the first configuration whose pairs use up every sentence of the shorter text,
+    since no other configuration can have more pairs. Later configurations that would only tie it are then not tried. Default is False
+
+    Output:
+    [[sureness, percent, number of pairs] of the best configuration, its pairs,
+    a list of [sureness, percent, number of pairs, seconds] for every configuration that was run]
+    """
+
+    artifacts = AlignmentArtifacts()
+    most_pairs = -1
+    if early_stop:
+        ENG_count = sum(len(artifacts.sentences(line)) for line in ENG_lines)
+        INA_count = sum(len(artifacts.sentences(line)) for line in INA_lines)
+        most_pairs = min(ENG_count, INA_count)
+
+    if workers > 0:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=set_translation_lines_in_worker, initargs=(ENG_lines, INA_lines))
+        tasks = [pool.submit(run_translation_config_in_worker, config[0], config[1], has_verse_pairs) for config in translation_grid]
+        results = (task.result() for task in tasks)
+    else:
+        pool = None
+        results = (run_translation_config(ENG_lines, INA_lines, config[0], config[1], has_verse_pairs, artifacts) for config in translation_grid)
+
+    maxcountpairs = 0
+    maximum = [0,0,0]
+    maximum_pairs = []
+    output = []
+    try:
+        for sureness, percent, pairs, seconds in results:
+            output.append([sureness, percent, len(pairs), seconds])
+            if((len(pairs) > maxcountpairs) or ((len(pairs) == maxcountpairs) and percent >= maximum[1] and sureness >= maximum[0])):
+                maxcountpairs = len(pairs)
+                maximum = [sureness,percent,len(pairs)]
+                maximum_pairs = pairs
+            print("Count:", len(pairs), "| Sureness:", sureness, "| Percent:", percent, "| Seconds:", round(seconds, 3))
+            if len(pairs) == most_pairs:
+                print("Every sentence is paired, stopping early")
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    return [maximum, maximum_pairs, output]
+
+
+def parallel_sentences_extractor(save_dir, save_name, pair_dir, pair_list, IA_file_name = "_IA.txt", EN_file_name = "_EN.txt", only_get_verse_pairs = False, has_verse_pairs = False, passages = True, aligner = "greedy", grid_workers = 0, early_stop = False, pdf_workers = 0, min_parallel_pages = 100):
     """
     Gets the parallel sentences for a list of paired texts.
     
@@ -1166,6 +3310,11 @@ def parallel_sentences_extractor(save_dir, save_name, pair_dir, pair_list, IA_fi
     only_get_verse_pairs - If True, only accept pairs that have the same verse number. Only works if the verse numbers are seperated by a colon. E.g "2:3." Default is False
     only_get_verse_pairs - Set to true if the texts have verses. Default is false.
     passages - Set to True if the text in the passages are seperated into paragraphs and not sentences. Default is True
+    aligner - "greedy" tries every sureness and percent with parallel_texts and keeps the one with the most pairs. "gale_church" aligns once with gale_church_texts. Default is "greedy"
+    grid_workers - The number of worker processes the sureness and percent grid is spread over (see sweep_translation_grid). Default is 0
+    early_stop - If True, the grid sweep stops once a configuration pairs every sentence of the shorter text. Default is False
+    pdf_workers - The number of worker processes the pages of long pdfs are laid out by (see get_pdf_text). Default is 0
+    min_parallel_pages - Pdfs with fewer pages are laid out in this process. Default is 100
     
     Output:
     Returns -1 if the Interlingua text file is not a pdf, txt, or html file. Return -2 if the English text file is not a pdf, txt, or html file. Returns 0 if everything worked. Will store the parallel sentences in the variable save_dir directory.
@@ -1199,7 +3348,7 @@ def parallel_sentences_extractor(save_dir, save_name, pair_dir, pair_list, IA_fi
                 INA_lines = [" ".join(INA_lines)]
                 INA_lines = extract_sentences(0.3, INA_lines)[3]
         elif(text_IA.find(".pdf")!=-1):
-            INA_lines = get_pdf_text(text_IA, False)
+            INA_lines = get_pdf_text(text_IA, False, pdf_workers=pdf_workers, min_parallel_pages=min_parallel_pages)
             if not passages:
                 INA_lines = [" ".join(INA_lines)]
                 INA_lines = extract_sentences(0.3, INA_lines)[3]
@@ -1210,6 +3359,7 @@ def parallel_sentences_extractor(save_dir, save_name, pair_dir, pair_list, IA_fi
                 INA_lines = [" ".join(INA_lines)]
                 INA_lines = extract_sentences(0.3, INA_lines)[3]
         else:
+            close_pdf_pool()
             return -1
 
         if(text_EN.find(".txt")!=-1):
@@ -1218,7 +3368,7 @@ def parallel_sentences_extractor(save_dir, save_name, pair_dir, pair_list, IA_fi
                 ENG_lines = [" ".join(ENG_lines)]
                 ENG_lines = extract_sentences(0.3, ENG_lines)[3]
         elif(text_EN.find(".pdf")!=-1):
-            ENG_lines = get_pdf_text(text_EN, False)
+            ENG_lines = get_pdf_text(text_EN, False, pdf_workers=pdf_workers, min_parallel_pages=min_parallel_pages)
             if not passages:
                 ENG_lines = [" ".join(ENG_lines)]
                 ENG_lines = extract_sentences(0.3, ENG_lines)[3]
@@ -1229,65 +3379,24 @@ def parallel_sentences_extractor(save_dir, save_name, pair_dir, pair_list, IA_fi
                 ENG_lines = [" ".join(ENG_lines)]
                 ENG_lines = extract_sentences(0.3, ENG_lines)[3]
         else:
+            close_pdf_pool()
             return -2
 
         if only_get_verse_pairs:
             pairs = parallel_verses(ENG_lines, INA_lines)
+        elif aligner == "gale_church":
+            pairs = translation(ENG_lines, INA_lines, aligner = aligner)
+            if has_verse_pairs:
+                pairs = filter_verse_pairs(pairs)
         else:
-            maxcountpairs = 0
-            output = []
-            maximum = [0,0,0]
-            maximum_pairs = []
-            for i in range(8):
-                for j in range(11):
-                    sureness = i + 3
-                    percent = round(0.6 + j*0.025,3)
-                    os.chdir(baseDir + "/" + pair_dir + "/" + file)
-                    pairs = translation(ENG_lines, INA_lines, sureness, percent)
-
-                    if has_verse_pairs:
-                        correct_verse_pairs = []
-                        correct = 1
-                        for pair in pairs:
-                            first_colon = pair[0].find(":")
-                            if first_colon != -1 and pair[0][first_colon-1].isdigit() and pair[0][first_colon+1].isdigit:
-                                start = first_colon - 1
-                                while start >= 0:
-                                    if not pair[0][start].isdigit():
-                                        break
-                                    start = start - 1
-                                start = start + 1
-
-                                end = first_colon + 1
-                                while end < len(pair[0]):
-                                    if not pair[0][end].isdigit():
-                                        break
-                                    end = end + 1
-
-                                verse_number = pair[0][start:end]
-
-                                if pair[1].find(verse_number) != -1:
-                                    correct = 1
-                                    correct_verse_pairs.append(pair)
-                                else:
-                                    correct = 0
-                            else:
-                                if correct == 1:
-                                    correct_verse_pairs.append(pair)
-
-                        pairs = correct_verse_pairs
-
-                    output.append([sureness,percent,len(pairs)])
-                    if((len(pairs) > maxcountpairs) or ((len(pairs) == maxcountpairs) and percent >= maximum[1] and sureness >= maximum[0])):
-                        maxcountpairs = len(pairs)
-                        maximum = [sureness,percent,len(pairs)]
-                        maximum_pairs = pairs
-                    print("Count:", len(pairs), "| Sureness:", sureness, "| Percent:", percent)
+            sweep_start = time.time()
+            maximum, maximum_pairs, output = sweep_translation_grid(ENG_lines, INA_lines, has_verse_pairs, grid_workers, early_stop)
+            print("Sweep seconds:", round(time.time() - sweep_start, 3))
             print("========")
             output = sorted(output, key=itemgetter(2))
 
             for trial in output:
-                print("Count:", trial[2], "| Sureness:", trial[0], "| Percent:", trial[1])
+                print("Count:", trial[2], "| Sureness:", trial[0], "| Percent:", trial[1], "| Seconds:", round(trial[3], 3))
             pairs = maximum_pairs
             print("Max:", maximum)
             print("========")
@@ -1330,10 +3439,12 @@ def parallel_sentences_extractor(save_dir, save_name, pair_dir, pair_list, IA_fi
     print("Number of INA Sentences: ", INA)
     print("Percent: ", count / ENG * 100, "%")
 
+    close_pdf_pool()
     return 0
 
 
 model = fasttext.load_model("8_lang_50k_model.bin")
+language_cache = LanguageCache()
 if __name__ == "__main__":
     crawler(30,100000,0.6,True)
 